@@ -2,8 +2,6 @@ import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from openai import OpenAI
-import os
 import json
 import base64
 from datetime import datetime
@@ -13,9 +11,10 @@ from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-
-# Initialize OpenAI client
-openai = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+import question_bank
+import llm
+import schemas
+from deadlines import DeadlineExceeded
 
 # Set timezone to US/New York
 ny_timezone = pytz.timezone('America/New_York')
@@ -31,12 +30,17 @@ def fig_to_img(fig, width=500):
     # Create and return the Image object
     return Image(img_buffer, width=width, height=width * 0.6)
 
-def calculate_score(questions, answers):
-    correct = 0
-    for q, a in zip(questions, answers):
-        if a == q["correct_answer"]:
-            correct += 1
-    return (correct / len(questions)) * 100
+def grade_answers(questions, answers):
+    """Return 1 for each correct answer and 0 otherwise"""
+    return [
+        1 if a == q["correct_answer"] else 0
+        for q, a in zip(questions, answers)
+    ]
+
+def calculate_score(questions, answers, correct_answers=None):
+    if correct_answers is None:
+        correct_answers = grade_answers(questions, answers)
+    return (sum(correct_answers) / len(questions)) * 100
 
 def analyze_notes(notes, role):
     if not any(notes) or all(note.strip() == "" for note in notes):
@@ -52,15 +56,28 @@ def analyze_notes(notes, role):
     - recommendations: specific suggestions for improvement"""
 
     try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",
+        return llm.structured_completion(
+            llm.PRIORITY_NOTES_ANALYSIS,
+            lambda response: schemas.parse_response(response, schemas.validate_notes_analysis),
             messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
+            response_format=schemas.response_format("notes_analysis", schemas.NOTES_ANALYSIS_SCHEMA)
         )
-        return json.loads(response.choices[0].message.content)
+    except DeadlineExceeded:
+        # Callers defer the analysis instead of blocking the results page
+        raise
     except:
         return None
 
+def process_deferred_notes():
+    """Run notes analyses that were deferred past the results page deadline"""
+    completed = 0
+    for attempt in question_bank.pending_notes_analyses():
+        notes_analysis = analyze_notes(json.loads(attempt["notes"] or "[]"), attempt["role"])
+        if notes_analysis:
+            question_bank.save_notes_analysis(attempt["candidate_id"], notes_analysis)
+            completed += 1
+    return completed
+
 def create_pdf_report(analytics_data, figures):
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
@@ -151,18 +168,39 @@ def create_pdf_report(analytics_data, figures):
     return buffer
 
 def generate_analytics(questions, answers, times, notes, candidate_info):
-    # Score calculation
-    score = calculate_score(questions, answers)
+    # Grade once and reuse for the score, charts and item statistics
+    correct_answers = grade_answers(questions, answers)
+    score = calculate_score(questions, answers, correct_answers)
     avg_time = sum(times)/len(times)
 
+    # Notes analysis past the page deadline is deferred to process_deferred_notes()
+    try:
+        notes_analysis = analyze_notes(notes, candidate_info["role"])
+        notes_deferred = False
+    except DeadlineExceeded:
+        notes_analysis = None
+        notes_deferred = True
+
     # Store analytics data and figures
     analytics_data = {
         "candidate_info": candidate_info,
         "score": score,
         "avg_time": avg_time,
-        "notes_analysis": analyze_notes(notes, candidate_info["role"])
+        "notes_analysis": notes_analysis
     }
 
+    # Store responses for question calibration
+    try:
+        recorded = question_bank.record_attempt(
+            candidate_info, questions, answers, times, correct_answers,
+            score, avg_time, notes_analysis, notes=notes, notes_pending=notes_deferred
+        )
+        # A later rerun of the results page may finish an analysis that was deferred
+        if not recorded and notes_analysis:
+            question_bank.save_notes_analysis(candidate_info["id"], notes_analysis)
+    except Exception as e:
+        st.warning(f"Could not save attempt: {str(e)}")
+
     figures = {}
 
     # Display performance overview
@@ -197,11 +235,6 @@ def generate_analytics(questions, answers, times, notes, candidate_info):
     figures["Time Analysis"] = fig_time
 
     # Question performance with enhanced visuals
-    correct_answers = [
-        1 if a == q["correct_answer"] else 0
-        for q, a in zip(questions, answers)
-    ]
-
     fig_performance = px.pie(
         values=[sum(correct_answers), len(questions) - sum(correct_answers)],
         names=['Correct', 'Incorrect'],
@@ -235,6 +268,9 @@ def generate_analytics(questions, answers, times, notes, candidate_info):
     figures["Performance vs Time"] = fig_scatter
 
     # AI Analysis of notes
+    if notes_deferred:
+        st.info("🤖 AI insights are taking longer than usual and will be added to the stored report once ready.")
+
     if analytics_data['notes_analysis']:
         st.header("🤖 AI-Powered Insights")
 
@@ -302,4 +338,7 @@ def show_results_page():
     **CTC Range:** {st.session_state.candidate_info['ctc_range']}
     **Preferred Location:** {st.session_state.candidate_info['preferred_location']}
     **Willing to Relocate:** {st.session_state.candidate_info['willing_to_relocate']}
-    """)
\ No newline at end of file
+    """)
+
+if __name__ == "__main__":
+    print(f"Completed {process_deferred_notes()} deferred notes analyses")
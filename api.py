@@ -0,0 +1,192 @@
+import asyncio
+import base64
+import binascii
+import json
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+import llm
+import ledger
+import deadlines
+import cv_analysis
+import export
+import quiz_generator
+from analytics import grade_answers, calculate_score, analyze_notes
+from roles import TECH_ROLES
+
+app = FastAPI(title="AI Technical Interview API", version="1.0")
+
+class QuestionsRequest(BaseModel):
+    tool: str
+    difficulty: str
+
+class Question(BaseModel):
+    id: int | None = None
+    question: str
+    options: list[str]
+    correct_answer: str
+    topics: list[str] = []
+
+class AssembleRequest(BaseModel):
+    query: str
+    tool: str
+    difficulty: str
+    count: int = 10
+
+class QuestionsResponse(BaseModel):
+    questions: list[Question]
+
+class ExtractTextRequest(BaseModel):
+    pdf_base64: str
+
+class ExtractTextResponse(BaseModel):
+    text: str
+
+class AnalyzeCVRequest(BaseModel):
+    cv_text: str
+
+class AnalyzeCVResponse(BaseModel):
+    candidate_name: str
+    suggested_role: str
+    confidence: float
+    reasoning: str
+    education: str
+    key_skills: list[str]
+    recommended_languages: list[str]
+    years_of_experience: str
+    # "keywords" when the LLM missed the deadline and the role came from TECH_ROLES keywords
+    analysis_source: str = "llm"
+
+class ScoreRequest(BaseModel):
+    questions: list[Question]
+    answers: list[str]
+
+class ScoreResponse(BaseModel):
+    score: float
+    correct_answers: list[int]
+
+class AnalyzeNotesRequest(BaseModel):
+    notes: list[str]
+    role: str
+
+class AnalyzeNotesResponse(BaseModel):
+    analysis: dict | None
+
+async def _run_llm_task(func, *args):
+    """Run a blocking LLM-backed function off the event loop and map failures to HTTP errors"""
+    try:
+        return await asyncio.to_thread(func, *args)
+    except llm.SchedulerOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except deadlines.DeadlineExceeded as e:
+        # Reached only when the call has no fallback left (e.g. the bank can't fill the set)
+        raise HTTPException(status_code=504, detail=str(e))
+    except (json.JSONDecodeError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=502, detail=f"Invalid model response: {str(e)}")
+
+async def _iterate_in_thread(chunks):
+    """Drive a blocking generator from one dedicated thread
+
+    SQLite connections may only be used by the thread that opened them, so every step
+    of an export stream runs on the same worker instead of whichever one is free.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+    try:
+        while True:
+            chunk = await loop.run_in_executor(executor, next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        # Closes the connection on the same thread when the client disconnects early
+        await loop.run_in_executor(executor, chunks.close)
+        executor.shutdown(wait=False)
+
+@app.middleware("http")
+async def bind_request_context(request: Request, call_next):
+    # Attribute LLM spend to the caller's session (X-Session-ID header)
+    ledger.bind_session(request.headers.get("X-Session-ID"))
+    # Optional latency budget (X-Deadline-Ms); slow LLM calls fall back instead of blocking
+    deadline_ms = request.headers.get("X-Deadline-Ms")
+    seconds = int(deadline_ms) / 1000 if deadline_ms and deadline_ms.isdigit() else None
+    with deadlines.deadline_scope(seconds):
+        return await call_next(request)
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        **llm.scheduler.get_metrics(),
+        "hedging": llm.hedge_budget.get_metrics(),
+        "question_batching": quiz_generator.batcher.get_metrics(),
+    }
+
+@app.get("/usage")
+async def usage(start_day: str | None = None, end_day: str | None = None):
+    rows = await asyncio.to_thread(ledger.aggregate_report, start_day, end_day)
+    return {"usage": [dict(row) for row in rows]}
+
+@app.get("/export")
+async def export_attempts(format: str = "jsonl", role: str | None = None, tool: str | None = None,
+                          start_day: str | None = None, end_day: str | None = None):
+    # Parquet needs a seekable file; use `python export.py --format parquet` for that
+    if format not in ("csv", "jsonl"):
+        raise HTTPException(status_code=400, detail="format must be csv or jsonl")
+    records = export.iter_attempts(role, tool, start_day, end_day)
+    if format == "csv":
+        return StreamingResponse(_iterate_in_thread(export.iter_csv(records)), media_type="text/csv")
+    return StreamingResponse(_iterate_in_thread(export.iter_jsonl(records)), media_type="application/x-ndjson")
+
+@app.post("/questions", response_model=QuestionsResponse)
+async def generate_questions(request: QuestionsRequest):
+    questions = await _run_llm_task(quiz_generator.build_question_set, request.tool, request.difficulty)
+    return {"questions": questions}
+
+@app.post("/questions/assemble", response_model=QuestionsResponse)
+async def assemble_questions(request: AssembleRequest):
+    if not 1 <= request.count <= 50:
+        raise HTTPException(status_code=400, detail="count must be between 1 and 50")
+    if not quiz_generator.parse_topic_query(request.query):
+        raise HTTPException(status_code=400, detail="query must name at least one topic")
+    questions = await _run_llm_task(
+        quiz_generator.assemble_test, request.query, request.tool, request.difficulty, request.count
+    )
+    return {"questions": questions}
+
+@app.post("/cv/extract-text", response_model=ExtractTextResponse)
+async def extract_text(request: ExtractTextRequest):
+    try:
+        pdf_bytes = base64.b64decode(request.pdf_base64, validate=True)
+    except binascii.Error:
+        raise HTTPException(status_code=400, detail="pdf_base64 is not valid base64")
+    try:
+        text = await asyncio.to_thread(cv_analysis.extract_text_from_pdf, pdf_bytes)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error reading PDF: {str(e)}")
+    return {"text": text}
+
+@app.post("/cv/analyze", response_model=AnalyzeCVResponse)
+async def analyze_cv(request: AnalyzeCVRequest):
+    return await _run_llm_task(cv_analysis.analyze_cv, request.cv_text)
+
+@app.post("/score", response_model=ScoreResponse)
+async def score(request: ScoreRequest):
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="questions must not be empty")
+    questions = [question.model_dump() for question in request.questions]
+    correct_answers = grade_answers(questions, request.answers)
+    return {
+        "score": calculate_score(questions, request.answers, correct_answers),
+        "correct_answers": correct_answers,
+    }
+
+@app.post("/notes/analyze", response_model=AnalyzeNotesResponse)
+async def notes_analysis(request: AnalyzeNotesRequest):
+    if request.role not in TECH_ROLES:
+        raise HTTPException(status_code=400, detail=f"Unknown role: {request.role}")
+    return {"analysis": await _run_llm_task(analyze_notes, request.notes, request.role)}
@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+
+# Per-question round-trip benchmark against a real Streamlit server. Sessions are
+# seeded at the start of the interview and resumed with ?candidate=<ID>; each answer
+# is submitted the way the browser would, scoped to the fragment when the form is in one.
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _cpu_seconds(pid):
+    """User + system CPU of a process from /proc (Linux only), or None"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def seed_session():
+    """Store a session that is about to show question 1 and return its candidate ID"""
+    from session_store import get_session_store, serialize_state
+
+    candidate_id = uuid.uuid4().hex[:8].upper()
+    questions = []
+    for i in range(10):
+        options = [f"Option {chr(65 + j)} for question {i + 1}" for j in range(4)]
+        questions.append({"question": f"Benchmark question {i + 1}", "options": options, "correct_answer": options[0]})
+    state = {
+        "candidate_id": candidate_id,
+        "page": "interview",
+        "profile_completed": True,
+        "cv_uploaded": True,
+        "verification_shown": True,
+        "candidate_info": {"id": candidate_id, "name": "Benchmark Candidate", "role": "Backend Developer",
+                           "tool": "Python", "difficulty": "Medium", "datetime": time.strftime("%Y-%m-%d %H:%M:%S")},
+        "questions": questions,
+        "current_question": 0,
+        "answers": [],
+        "times": [],
+        "notes": [],
+        "start_time": time.time(),
+        "quiz_completed": False,
+    }
+    get_session_store().save(candidate_id, serialize_state(state))
+    return candidate_id
+
+async def _connect(url):
+    """Binary websocket with send(bytes) / recv() -> bytes or None"""
+    try:
+        from tornado.websocket import websocket_connect
+    except ImportError:
+        # Newer Streamlit releases run on starlette/websockets instead of tornado
+        import websockets
+        return _WebsocketsConnection(await websockets.connect(url, max_size=None))
+    return _TornadoConnection(await websocket_connect(url, max_message_size=1 << 30))
+
+class _TornadoConnection:
+    def __init__(self, ws):
+        self.ws = ws
+
+    async def send(self, data):
+        await self.ws.write_message(data, binary=True)
+
+    async def recv(self):
+        return await self.ws.read_message()
+
+    async def close(self):
+        self.ws.close()
+
+class _WebsocketsConnection:
+    def __init__(self, ws):
+        self.ws = ws
+
+    async def send(self, data):
+        await self.ws.send(data)
+
+    async def recv(self):
+        import websockets
+        try:
+            return await self.ws.recv()
+        except websockets.ConnectionClosed:
+            return None
+
+    async def close(self):
+        await self.ws.close()
+
+class ScriptSession:
+    """Minimal Streamlit websocket client: send reruns, wait for the script to finish"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.page_script_hash = ""
+        self.widgets = {}
+
+    async def rerun(self, query_string="", widget_states=(), fragment_id=""):
+        """Send a rerun and return the bytes received until the run(s) finish"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetStates
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = query_string
+        msg.rerun_script.page_script_hash = self.page_script_hash
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.CopyFrom(WidgetStates(widgets=list(widget_states)))
+        await self.ws.send(msg.SerializeToString())
+
+        received = 0
+        while True:
+            data = await self.ws.recv()
+            if data is None:
+                raise RuntimeError("Server closed the connection")
+            received += len(data)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = fwd.new_session.main_script_hash
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                widget = element.WhichOneof("type")
+                if widget in ("radio", "text_area", "button"):
+                    self.widgets[widget] = (getattr(element, widget).id, fwd.delta.fragment_id)
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("Script failed to compile")
+                # st.rerun() ends a run early and immediately starts another
+                if fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return received
+
+    def answer_states(self):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        radio_id, _ = self.widgets["radio"]
+        notes_id, _ = self.widgets["text_area"]
+        button_id, fragment_id = self.widgets["button"]
+        states = [
+            WidgetState(id=radio_id, int_value=0),
+            WidgetState(id=notes_id, string_value=""),
+            WidgetState(id=button_id, trigger_value=True),
+        ]
+        return states, fragment_id
+
+async def run_candidate(port, server_pid, results):
+    candidate_id = seed_session()
+    ws = await _connect(f"ws://127.0.0.1:{port}/_stcore/stream")
+    try:
+        session = ScriptSession(ws)
+        await session.rerun(query_string=f"candidate={candidate_id}")
+        # Questions 1-9; the last answer leaves the question loop
+        for _ in range(9):
+            states, fragment_id = session.answer_states()
+            cpu_before = _cpu_seconds(server_pid)
+            started = time.perf_counter()
+            received = await session.rerun(widget_states=states, fragment_id=fragment_id)
+            results["latency"].append(time.perf_counter() - started)
+            results["bytes"].append(received)
+            if cpu_before is not None:
+                results["cpu"].append(_cpu_seconds(server_pid) - cpu_before)
+            results["fragment_scoped"] = bool(fragment_id)
+    finally:
+        await ws.close()
+
+def _wait_for_server(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Streamlit server exited during startup")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Streamlit server did not start")
+
+def run_benchmark(app, candidates):
+    """Per-question latency, server CPU and bytes sent for `candidates` interviews
+
+    The server runs from the app's directory, so it uses that revision's .streamlit/config.toml.
+    """
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.basename(app),
+         "--server.headless", "true", "--server.port", str(port),
+         # Deployments don't watch the source; the watcher rescans every module per rerun
+         "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false"],
+        cwd=os.path.dirname(app), env=os.environ.copy(),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    results = {"latency": [], "cpu": [], "bytes": [], "fragment_scoped": False}
+    try:
+        _wait_for_server(port, server)
+        for _ in range(candidates):
+            asyncio.run(run_candidate(port, server.pid, results))
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "app": app,
+        "candidates": candidates,
+        "fragment_scoped": results["fragment_scoped"],
+        "questions": len(results["latency"]),
+        "p50_ms": 1000 * _percentile(results["latency"], 50),
+        "p90_ms": 1000 * _percentile(results["latency"], 90),
+        "mean_ms": 1000 * sum(results["latency"]) / len(results["latency"]),
+        "server_cpu_ms": 1000 * sum(results["cpu"]) / len(results["cpu"]) if results["cpu"] else None,
+        "kb_per_question": sum(results["bytes"]) / len(results["bytes"]) / 1024,
+    }
+
+def print_report(reports):
+    print(f"{'App':<40}{'scope':>10}{'p50 ms':>9}{'p90 ms':>9}{'cpu ms':>9}{'KB':>8}")
+    for r in reports:
+        cpu = f"{r['server_cpu_ms']:.1f}" if r["server_cpu_ms"] is not None else "n/a"
+        scope = "fragment" if r["fragment_scoped"] else "app"
+        print(f"{r['app'][-40:]:<40}{scope:>10}{r['p50_ms']:>9.1f}{r['p90_ms']:>9.1f}{cpu:>9}"
+              f"{r['kb_per_question']:>8.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-question latency of the interview loop on a real server")
+    parser.add_argument("--app", action="append",
+                        help="App script to benchmark; repeat to compare (e.g. a worktree of an older revision)")
+    parser.add_argument("--candidates", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    apps = [os.path.abspath(app) for app in (args.app or [os.path.join(here, "main.py")])]
+    os.environ["LLM_BACKEND"] = "mock"
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    with tempfile.TemporaryDirectory(prefix="bench_interview_") as scratch:
+        # Every server shares the scratch session store the sessions are seeded into; never a
+        # configured production store or bank
+        os.environ["SESSION_BACKEND"] = "sqlite"
+        os.environ["SESSION_DB_PATH"] = os.path.join(scratch, "sessions.db")
+        os.environ["QUESTION_BANK_PATH"] = os.path.join(scratch, "interview_data.db")
+        reports = [run_benchmark(app, args.candidates) for app in apps]
+    print_report(reports)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
@@ -0,0 +1,98 @@
+import argparse
+import os
+import tempfile
+import time
+import ledger
+import llm
+import question_bank
+import cv_analysis
+import quiz_generator
+from analytics import analyze_notes
+
+SAMPLE_CV = """Jane Doe - Senior Software Engineer
+Experience: 2019-present Backend Engineer at Acme Corp, building Python and Go microservices,
+PostgreSQL schemas and REST APIs. 2017-2019 Software Developer at Initech (Django, Celery, AWS).
+Education: B.Tech Computer Science, IIT Delhi, 2017.
+Skills: Python, Go, Django, PostgreSQL, Docker, Kubernetes, AWS, system design, mentoring."""
+
+SAMPLE_NOTES = [
+    "Explained the GIL trade-offs clearly",
+    "",
+    "Unsure about asyncio cancellation semantics",
+    "Good reasoning about database indexing",
+]
+
+def _notes_analysis():
+    # analyze_notes swallows errors and returns None
+    if analyze_notes(SAMPLE_NOTES, "Backend Developer") is None:
+        raise ValueError("No analysis returned")
+
+# One representative request per call site
+CALL_SITES = {
+    "first_question": lambda: quiz_generator.request_questions(
+        "Python", "Hard", 1, llm.PRIORITY_FIRST_QUESTION, timeout=30),
+    "remaining_questions": lambda: quiz_generator.request_questions(
+        "Python", "Hard", 9, llm.PRIORITY_REMAINING_QUESTIONS, timeout=60),
+    "cv_analysis": lambda: cv_analysis.analyze_cv(SAMPLE_CV),
+    "notes_analysis": _notes_analysis,
+}
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+def run_benchmark(models, runs, call_sites):
+    """Latency and validation pass rate for each (call site, model) pair, without fallback or hedging"""
+    saved_tiers = dict(llm.MODEL_TIERS)
+    saved_settings = (llm.HEDGE_ENABLED, question_bank.DB_PATH,
+                      ledger.SESSION_TOKEN_BUDGET, ledger.DAILY_TOKEN_BUDGET)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_models_") as scratch:
+        llm.HEDGE_ENABLED = False
+        # Record into a scratch ledger so runs don't spend the daily budget real interviews
+        # share, and lift the budgets so the fallback model never replaces the one measured
+        question_bank.DB_PATH = os.path.join(scratch, "interview_data.db")
+        ledger.SESSION_TOKEN_BUDGET = ledger.DAILY_TOKEN_BUDGET = 0
+        try:
+            for call_site in call_sites:
+                for model in models:
+                    llm.MODEL_TIERS[call_site] = [model]
+                    latencies, passed = [], 0
+                    for _ in range(runs):
+                        started = time.perf_counter()
+                        try:
+                            CALL_SITES[call_site]()
+                            passed += 1
+                        except Exception:
+                            pass
+                        latencies.append(time.perf_counter() - started)
+                    results.append({
+                        "call_site": call_site,
+                        "model": model,
+                        "runs": runs,
+                        "pass_rate": passed / runs,
+                        "p50": _percentile(latencies, 50),
+                        "p90": _percentile(latencies, 90),
+                    })
+        finally:
+            llm.MODEL_TIERS.update(saved_tiers)
+            (llm.HEDGE_ENABLED, question_bank.DB_PATH,
+             ledger.SESSION_TOKEN_BUDGET, ledger.DAILY_TOKEN_BUDGET) = saved_settings
+    return results
+
+if __name__ == "__main__":
+    all_models = sorted({model for models in llm.MODEL_TIERS.values() for model in models})
+    parser = argparse.ArgumentParser(description="Compare latency and validation pass rate per model tier")
+    parser.add_argument("--models", default=",".join(all_models), help="Comma-separated models to compare")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--call-sites", default=",".join(CALL_SITES), help="Comma-separated call sites")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        [m.strip() for m in args.models.split(",") if m.strip()],
+        args.runs,
+        [c.strip() for c in args.call_sites.split(",") if c.strip()]
+    )
+    print(f"{'Call site':<22}{'Model':<16}{'runs':>6}{'valid':>8}{'p50 s':>9}{'p90 s':>9}")
+    for r in results:
+        print(f"{r['call_site']:<22}{r['model']:<16}{r['runs']:>6}{r['pass_rate']:>8.0%}{r['p50']:>9.2f}{r['p90']:>9.2f}")
@@ -0,0 +1,94 @@
+import io
+import re
+import PyPDF2
+import llm
+import schemas
+from roles import TECH_ROLES
+from deadlines import DeadlineExceeded
+
+def analyze_cv(cv_content):
+    """Analyze CV content and suggest a role (raises on failure)"""
+    prompt = f"""Analyze this CV and extract the following information with high attention to detail:
+    1. The candidate's full name from the CV
+    2. The most appropriate technical role from these options: {', '.join(TECH_ROLES.keys())}
+    3. Analyze work experience holistically:
+       - Consider all professional experience in the CV
+       - Include relevant projects and contributions
+       - Consider depth and breadth of experience
+       - Provide total years of experience as a single number or range (e.g. "5 years" or "4-5 years")
+    4. Extract education details, including degree and institution
+    5. List key technical and soft skills with confidence levels
+    6. For the selected role, identify the most relevant programming languages or tools
+
+    CV Content:
+    {cv_content}
+
+    Respond in JSON format with:
+    {{
+        "candidate_name": "full name from CV",
+        "suggested_role": "one of the roles listed above",
+        "confidence": number between 0 and 1,
+        "reasoning": "brief explanation for the suggestion",
+        "education": "detailed education background",
+        "key_skills": ["list of key technical and soft skills"],
+        "recommended_languages": ["list of relevant programming languages"],
+        "years_of_experience": "total years of experience"
+    }}
+    """
+
+    # suggested_role is validated against TECH_ROLES, so the lookup below is safe
+    try:
+        analysis = llm.structured_completion(
+            llm.PRIORITY_CV_ANALYSIS,
+            lambda response: schemas.parse_response(response, schemas.validate_cv_analysis),
+            messages=[{"role": "user", "content": prompt}],
+            response_format=schemas.response_format("cv_analysis", schemas.CV_ANALYSIS_SCHEMA)
+        )
+    except DeadlineExceeded:
+        return suggest_role_by_keywords(cv_content)
+
+    # Filter languages based on the suggested role
+    role_languages = TECH_ROLES[analysis["suggested_role"]]["languages"]
+    analysis["recommended_languages"] = [lang for lang in analysis["recommended_languages"] if lang in role_languages]
+
+    return analysis
+
+def _count_term(term, text):
+    # Whole words only, so "ai" doesn't match "email" and "api" doesn't match "capital";
+    # lookarounds rather than \b so a term that starts or ends in punctuation still matches
+    return len(re.findall(rf"(?<!\w){re.escape(term.lower())}(?!\w)", text))
+
+def suggest_role_by_keywords(cv_content):
+    """Fast role suggestion from TECH_ROLES keywords, used when the LLM misses its deadline"""
+    text = cv_content.lower()
+    scores = {
+        role: sum(_count_term(keyword, text) for keyword in info["keywords"])
+        for role, info in TECH_ROLES.items()
+    }
+    role = max(scores, key=scores.get)
+    total = sum(scores.values())
+
+    lines = [line.strip() for line in cv_content.splitlines() if line.strip()]
+    years = re.search(r"(\d+(?:\.\d+)?)\+?\s*(?:years|yrs)", text)
+    matched_keywords = [keyword for keyword in TECH_ROLES[role]["keywords"] if _count_term(keyword, text)]
+
+    return {
+        "candidate_name": lines[0][:80] if lines else "Candidate",
+        "suggested_role": role,
+        "confidence": scores[role] / total if total else 0.0,
+        "reasoning": "Suggested from CV keywords because the AI analysis did not finish in time",
+        "education": "Not specified",
+        "key_skills": matched_keywords,
+        "recommended_languages": [lang for lang in TECH_ROLES[role]["languages"] if _count_term(lang, text)],
+        "years_of_experience": f"{years.group(1)} years" if years else "Not specified",
+        "analysis_source": "keywords",
+    }
+
+def extract_text_from_pdf(pdf_bytes):
+    """Extract text content from uploaded PDF (raises on failure)"""
+    pdf_file = io.BytesIO(pdf_bytes)
+    reader = PyPDF2.PdfReader(pdf_file)
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text()
+    return text
@@ -0,0 +1,53 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+# Latency SLO per page transition in seconds; LLM work on that page must finish inside it
+PAGE_SLOS = {
+    "profile": float(os.environ.get("DEADLINE_PROFILE", 25)),      # CV analysis
+    "interview": float(os.environ.get("DEADLINE_INTERVIEW", 40)),  # question generation
+    "results": float(os.environ.get("DEADLINE_RESULTS", 25)),      # notes analysis
+}
+# Time kept back from every deadline so the fallback path can still render
+FALLBACK_RESERVE = float(os.environ.get("DEADLINE_FALLBACK_RESERVE", 1.5))
+# Don't start an LLM call with less time than this left
+MIN_CALL_TIME = 1.0
+
+class DeadlineExceeded(Exception):
+    """Raised when the current deadline leaves no time for (another) LLM call"""
+
+# Absolute time.monotonic() deadline for the current script run / request
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+@contextmanager
+def deadline_scope(seconds):
+    """Run the block under a deadline `seconds` from now (nested scopes keep the earliest)"""
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining():
+    """Usable seconds left (after the fallback reserve), or None without a deadline"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic() - FALLBACK_RESERVE
+
+def nearly_expired():
+    left = remaining()
+    return left is not None and left < MIN_CALL_TIME
+
+def check():
+    """Raise DeadlineExceeded if there is no time left for a call"""
+    if nearly_expired():
+        raise DeadlineExceeded("Deadline reached before the LLM call could start")
@@ -0,0 +1,181 @@
+import argparse
+import csv
+import io
+import itertools
+import json
+import sys
+import question_bank
+
+CSV_FIELDS = [
+    "candidate_id", "name", "role", "tool", "difficulty", "started_at", "score", "avg_time",
+    "total_time", "questions_answered", "correct_count",
+    "cv_suggested_role", "cv_confidence", "cv_years_of_experience", "cv_education", "cv_key_skills",
+    "role_fit", "notes_pending", "answers", "notes_analysis",
+]
+
+# Rows fetched from SQLite per round trip; memory use is bounded by this, not the export size
+BATCH_SIZE = 500
+
+def _date_bounds(start_day, end_day):
+    clauses, params = [], []
+    if start_day:
+        clauses.append("a.started_at >= ?")
+        params.append(start_day)
+    if end_day:
+        clauses.append("a.started_at <= ?")
+        # A bare date includes the whole day
+        params.append(end_day + " 23:59:59" if len(end_day) == 10 else end_day)
+    return clauses, params
+
+def iter_attempts(role=None, tool=None, start_day=None, end_day=None):
+    """Yield one dict per stored attempt, with its answers, streaming from the database"""
+    clauses, params = _date_bounds(start_day, end_day)
+    if role:
+        clauses.append("a.role = ?")
+        params.append(role)
+    if tool:
+        clauses.append("a.tool = ?")
+        params.append(tool)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    conn = question_bank.get_connection()
+    try:
+        cursor = conn.execute(
+            f"""SELECT a.id AS attempt_id, a.candidate_id, a.name, a.role, a.tool, a.difficulty,
+                       a.started_at, a.score, a.avg_time, a.cv_analysis, a.notes_analysis, a.notes_pending,
+                       r.position, r.answer, r.correct, r.time, q.question, q.correct_answer
+                FROM attempts a
+                LEFT JOIN responses r ON r.attempt_id = a.id
+                LEFT JOIN questions q ON q.id = r.question_id
+                {where}
+                ORDER BY a.id, r.position""",
+            params
+        )
+        cursor.arraysize = BATCH_SIZE
+        rows = itertools.chain.from_iterable(iter(cursor.fetchmany, []))
+        for _, group in itertools.groupby(rows, key=lambda row: row["attempt_id"]):
+            group = list(group)
+            first = group[0]
+            answers = [
+                {
+                    "position": row["position"] + 1,
+                    "question": row["question"],
+                    "answer": row["answer"],
+                    "correct_answer": row["correct_answer"],
+                    "correct": bool(row["correct"]),
+                    "time": row["time"],
+                }
+                for row in group if row["position"] is not None
+            ]
+            yield {
+                "candidate_id": first["candidate_id"],
+                "name": first["name"],
+                "role": first["role"],
+                "tool": first["tool"],
+                "difficulty": first["difficulty"],
+                "started_at": first["started_at"],
+                "score": first["score"],
+                "avg_time": first["avg_time"],
+                "total_time": sum(answer["time"] for answer in answers),
+                "answers": answers,
+                "cv_analysis": json.loads(first["cv_analysis"] or "null"),
+                "notes_analysis": json.loads(first["notes_analysis"] or "null"),
+                "notes_pending": bool(first["notes_pending"]),
+            }
+    finally:
+        conn.close()
+
+def flatten(record):
+    """One flat row per attempt for CSV/Parquet; nested parts are kept as JSON strings"""
+    cv = record["cv_analysis"] or {}
+    notes = record["notes_analysis"] or {}
+    return {
+        "candidate_id": record["candidate_id"],
+        "name": record["name"],
+        "role": record["role"],
+        "tool": record["tool"],
+        "difficulty": record["difficulty"],
+        "started_at": record["started_at"],
+        "score": record["score"],
+        "avg_time": record["avg_time"],
+        "total_time": record["total_time"],
+        "questions_answered": len(record["answers"]),
+        "correct_count": sum(answer["correct"] for answer in record["answers"]),
+        "cv_suggested_role": cv.get("suggested_role"),
+        "cv_confidence": cv.get("confidence"),
+        "cv_years_of_experience": cv.get("years_of_experience"),
+        "cv_education": cv.get("education"),
+        "cv_key_skills": "; ".join(cv.get("key_skills") or []),
+        "role_fit": notes.get("role_fit"),
+        "notes_pending": record["notes_pending"],
+        "answers": json.dumps(record["answers"]),
+        "notes_analysis": json.dumps(record["notes_analysis"]),
+    }
+
+def iter_jsonl(records):
+    """Yield JSON Lines text chunks"""
+    for record in records:
+        yield json.dumps(record) + "\n"
+
+def iter_csv(records):
+    """Yield CSV text chunks, header first"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(flatten(record))
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def write_parquet(records, path):
+    """Write records to Parquet one row group per batch (requires pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("candidate_id", pa.string()), ("name", pa.string()), ("role", pa.string()),
+        ("tool", pa.string()), ("difficulty", pa.string()), ("started_at", pa.string()),
+        ("score", pa.float64()), ("avg_time", pa.float64()), ("total_time", pa.float64()),
+        ("questions_answered", pa.int32()), ("correct_count", pa.int32()),
+        ("cv_suggested_role", pa.string()), ("cv_confidence", pa.float64()),
+        ("cv_years_of_experience", pa.string()), ("cv_education", pa.string()),
+        ("cv_key_skills", pa.string()), ("role_fit", pa.float64()), ("notes_pending", pa.bool_()),
+        ("answers", pa.string()), ("notes_analysis", pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        while True:
+            batch = [flatten(record) for record in itertools.islice(records, BATCH_SIZE)]
+            if not batch:
+                break
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream stored attempts to CSV, JSONL or Parquet")
+    parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--role")
+    parser.add_argument("--tool")
+    parser.add_argument("--from", dest="start_day", help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end_day", help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--output", help="Output file (stdout for csv/jsonl when omitted)")
+    args = parser.parse_args()
+
+    records = iter_attempts(args.role, args.tool, args.start_day, args.end_day)
+    if args.format == "parquet":
+        if not args.output:
+            parser.error("--output is required for parquet")
+        print(f"Exported {write_parquet(records, args.output)} attempts to {args.output}")
+    else:
+        chunks = iter_csv(records) if args.format == "csv" else iter_jsonl(records)
+        out = open(args.output, "w", newline="") if args.output else sys.stdout
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
@@ -0,0 +1,325 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+import question_bank
+
+# An item served this many times has half the sampling weight of a fresh one
+EXPOSURE_SCALE = float(os.environ.get("EXPOSURE_SCALE", 10))
+# Items are no longer served past this many serves, and are queued for regeneration
+MAX_SERVES = int(os.environ.get("EXPOSURE_MAX_SERVES", 100))
+# Items older than this are queued for regeneration as well (0 disables)
+STALE_DAYS = int(os.environ.get("EXPOSURE_STALE_DAYS", 365))
+# Reload serve counts from the bank this often, picking up other processes' serves,
+# new questions and retirements
+INDEX_TTL = float(os.environ.get("EXPOSURE_INDEX_TTL", 300))
+# Search results and pack draws offer this many candidates per question served, so
+# exposure weighting has room to rotate items instead of always serving the top matches
+POOL_FACTOR = int(os.environ.get("EXPOSURE_POOL_FACTOR", 5))
+# Items per alias-table block; a weight change rebuilds one block and the top-level table
+BLOCK_SIZE = 256
+
+def exposure_weight(serve_count):
+    if serve_count >= MAX_SERVES:
+        return 0.0
+    return 1.0 / (1.0 + serve_count / EXPOSURE_SCALE)
+
+def _stale_cutoff():
+    return (datetime.now() - timedelta(days=STALE_DAYS)).strftime("%Y-%m-%d %H:%M:%S") if STALE_DAYS else None
+
+def _effective_counts(rows):
+    """Serve count per id, with stale items counted as used up; also queues both kinds"""
+    cutoff = _stale_cutoff()
+    counts, overexposed, stale = {}, [], []
+    for row in rows:
+        serve_count = row["serve_count"]
+        if serve_count >= MAX_SERVES:
+            overexposed.append(row["id"])
+        elif cutoff and row["created_at"] < cutoff:
+            stale.append(row["id"])
+            serve_count = MAX_SERVES
+        counts[row["id"]] = serve_count
+    if overexposed:
+        question_bank.queue_regeneration(overexposed, "overexposed")
+    if stale:
+        question_bank.queue_regeneration(stale, "stale")
+    return counts
+
+class AliasTable:
+    """Vose's alias method: O(n) to build, O(1) per draw"""
+
+    def __init__(self, weights):
+        n = len(weights)
+        self.total = sum(weights)
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        if self.total <= 0:
+            return
+        scaled = [w * n / self.total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] += scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Whatever is left is 1 up to rounding
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self, rng):
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+class ExposureIndex:
+    """Exposure-weighted sampler over the questions of one (tool, difficulty)
+
+    Items live in fixed-size blocks, each with its own alias table, plus an alias
+    table over the block totals. A draw is two O(1) alias lookups, and a serve only
+    rebuilds the items' own blocks and the small top-level table.
+    """
+
+    def __init__(self, items, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self.ids = [qid for qid, _ in items]
+        self.counts = [count for _, count in items]
+        self.position = {qid: i for i, qid in enumerate(self.ids)}
+        n_blocks = (len(self.ids) + block_size - 1) // block_size
+        self.blocks = [self._build_block(b) for b in range(n_blocks)]
+        self.top = AliasTable([block.total for block in self.blocks])
+        self.dirty = set()
+
+    def _build_block(self, b):
+        start = b * self.block_size
+        return AliasTable([exposure_weight(c) for c in self.counts[start:start + self.block_size]])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def serve_count(self, qid):
+        return self.counts[self.position[qid]]
+
+    def set_count(self, qid, serve_count):
+        i = self.position.get(qid)
+        if i is not None:
+            self.counts[i] = serve_count
+            self.dirty.add(i // self.block_size)
+
+    def remove(self, qid):
+        # Zero weight; the slot is dropped at the next reload
+        self.set_count(qid, MAX_SERVES)
+
+    def _refresh(self):
+        if self.dirty:
+            for b in self.dirty:
+                self.blocks[b] = self._build_block(b)
+            self.top = AliasTable([block.total for block in self.blocks])
+            self.dirty.clear()
+
+    def sample(self, count, rng, exclude=()):
+        """Up to `count` distinct ids, drawn by exposure weight"""
+        self._refresh()
+        if self.top.total <= 0:
+            return []
+        chosen, seen = [], set(exclude)
+        # Rejection of repeats stays O(1) per pick while the bank is much larger than a set
+        for _ in range(count * 20):
+            b = self.top.draw(rng)
+            qid = self.ids[b * self.block_size + self.blocks[b].draw(rng)]
+            if qid in seen:
+                continue
+            seen.add(qid)
+            chosen.append(qid)
+            if len(chosen) == count:
+                break
+        if len(chosen) < count and len(self.ids) <= count * 4:
+            # Tiny bank: rejection can keep missing the last few items, so take them directly
+            rest = [qid for qid, c in zip(self.ids, self.counts) if qid not in seen and exposure_weight(c) > 0]
+            rng.shuffle(rest)
+            chosen += rest[:count - len(chosen)]
+        return chosen
+
+class ExposureSampler:
+    """Process-wide exposure indexes per (tool, difficulty), loaded from the bank
+
+    Each key has its own lock, so draws for one key never wait on another. An expired
+    index keeps serving while a background thread loads its replacement, which is then
+    swapped in; only a key's first load is built inline.
+    """
+
+    def __init__(self, ttl=INDEX_TTL):
+        self.ttl = ttl
+        self._indexes = {}     # key -> (ExposureIndex, loaded_at)
+        self._key_locks = {}   # key -> lock held while drawing from or updating its index
+        self._reloading = set()
+        self._lock = threading.Lock()   # guards the dicts above
+        self._rng = random.Random()
+
+    def _load(self, tool, difficulty):
+        counts = _effective_counts(question_bank.exposure_counts(tool, difficulty))
+        return ExposureIndex(list(counts.items()))
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _index(self, key):
+        """The key's index; call with the key's lock held"""
+        with self._lock:
+            entry = self._indexes.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl and key not in self._reloading:
+                self._reloading.add(key)
+                threading.Thread(target=self._reload, args=(key, entry), name="exposure-reload", daemon=True).start()
+        if entry is None:
+            entry = (self._load(*key), time.monotonic())
+            with self._lock:
+                self._indexes[key] = entry
+        return entry[0]
+
+    def _reload(self, key, expired):
+        try:
+            entry = (self._load(*key), time.monotonic())
+            with self._lock:
+                # Dropped by invalidate() meanwhile: the next draw loads afresh instead
+                if self._indexes.get(key) is expired:
+                    self._indexes[key] = entry
+        finally:
+            with self._lock:
+                self._reloading.discard(key)
+
+    def invalidate(self, tool, difficulty):
+        with self._lock:
+            self._indexes.pop((tool, difficulty), None)
+
+    def sample(self, tool, difficulty, count, exclude_ids=()):
+        """Pick up to `count` active questions weighted against exposure, and count the serves"""
+        key = (tool, difficulty)
+        with self._key_lock(key):
+            index = self._index(key)
+            questions, exclude = [], set(exclude_ids)
+            # Retry a few times for items retired since the index was loaded
+            for _ in range(3):
+                ids = index.sample(count - len(questions), self._rng, exclude)
+                if not ids:
+                    break
+                found = question_bank.get_questions(ids)
+                found_ids = {q["id"] for q in found}
+                for qid in ids:
+                    exclude.add(qid)
+                    if qid not in found_ids:
+                        index.remove(qid)
+                questions += found
+                if len(questions) == count:
+                    break
+
+        self._record_serves(tool, difficulty, [q["id"] for q in questions])
+        return questions
+
+    def choose(self, tool, difficulty, groups, count):
+        """Pick up to `count` questions from ranked candidate groups, weighted against exposure
+
+        Groups are taken round-robin (one per topic keeps a multi-topic test balanced); within a
+        group, candidates are ordered by weighted random keys (Efraimidis-Spirakis), so a fresh
+        item is likelier to come first and items past MAX_SERVES or stale are never served.
+        """
+        rows = question_bank.exposure_state({q["id"] for group in groups for q in group})
+        counts = _effective_counts([row for row in rows if row["status"] == "active"])
+        orders = []
+        with self._lock:
+            for group in groups:
+                keyed = [
+                    (self._rng.random() ** (1.0 / exposure_weight(counts[q["id"]])), q)
+                    for q in group if q["id"] in counts and exposure_weight(counts[q["id"]]) > 0
+                ]
+                orders.append([q for _, q in sorted(keyed, key=lambda pair: pair[0], reverse=True)])
+
+        questions, seen = [], set()
+        for candidates in itertools.zip_longest(*orders):
+            for q in candidates:
+                if q is None or q["id"] in seen or len(questions) == count:
+                    continue
+                seen.add(q["id"])
+                questions.append(q)
+        self._record_serves(tool, difficulty, [q["id"] for q in questions], counts)
+        return questions
+
+    def _record_serves(self, tool, difficulty, served, counts=None):
+        """Count serves in the bank and in a loaded index; queue items reaching MAX_SERVES"""
+        counts = dict(counts or {})
+        key = (tool, difficulty)
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._indexes.get(key)
+            for qid in served:
+                if entry is not None and qid in entry[0].position:
+                    counts[qid] = entry[0].serve_count(qid)
+                    entry[0].set_count(qid, counts[qid] + 1)
+        overexposed = [qid for qid in served if qid in counts and counts[qid] + 1 >= MAX_SERVES]
+        if served:
+            question_bank.record_serves(served)
+        if overexposed:
+            question_bank.queue_regeneration(overexposed, "overexposed")
+
+sampler = ExposureSampler()
+
+def sample_questions(tool, difficulty, count, exclude_ids=()):
+    """Exposure-controlled replacement for random sampling from the bank"""
+    return sampler.sample(tool, difficulty, count, exclude_ids)
+
+def search_questions(tool, difficulty, topics, count, exclude_ids=()):
+    """Topic search results for a test, rotated by exposure instead of always the top bm25 hits"""
+    groups = question_bank.search_candidates(tool, difficulty, topics, count * POOL_FACTOR, exclude_ids)
+    return sampler.choose(tool, difficulty, groups, count)
+
+def sample_pack(pack, tool, difficulty, count, exclude_questions=()):
+    """Exposure-controlled draw from a question pack; pack questions are mirrored into the bank,
+    which holds their serve counts"""
+    exclude_questions = set(exclude_questions)
+    pool = [q for q in pack.sample(tool, difficulty, count * POOL_FACTOR + len(exclude_questions))
+            if q["question"] not in exclude_questions]
+    return sampler.choose(tool, difficulty, [question_bank.add_questions(tool, difficulty, pool)], count)
+
+def regenerate_queued(limit=100):
+    """Generate replacements for queued questions and retire the originals"""
+    import llm
+    from quiz_generator import request_questions
+
+    groups = {}
+    for row in question_bank.pending_regenerations(limit):
+        groups.setdefault((row["tool"], row["difficulty"]), []).append(row)
+
+    replaced, failed = 0, 0
+    for (tool, difficulty), rows in groups.items():
+        for start in range(0, len(rows), 10):
+            chunk = rows[start:start + 10]
+            topics = sorted({topic for row in chunk for topic in json.loads(row["topics"])})
+            try:
+                questions = request_questions(tool, difficulty, len(chunk), llm.PRIORITY_REGENERATION,
+                                              timeout=120, topics=topics[:10])
+            except Exception as e:
+                print(f"Could not regenerate {len(chunk)} {difficulty} {tool} questions: {str(e)}")
+                failed += len(chunk)
+                continue
+            question_bank.add_questions(tool, difficulty, questions)
+            question_bank.complete_regeneration([row["question_id"] for row in chunk])
+            sampler.invalidate(tool, difficulty)
+            replaced += len(chunk)
+    return {"replaced": replaced, "failed": failed}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replace overexposed and stale questions in the bank")
+    parser.add_argument("--limit", type=int, default=100, help="Queued questions to process per pass")
+    parser.add_argument("--interval", type=float, help="Keep running, one pass every INTERVAL seconds")
+    args = parser.parse_args()
+
+    while True:
+        summary = regenerate_queued(args.limit)
+        print(f"Replaced {summary['replaced']} questions, {summary['failed']} failed")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,104 @@
+import math
+import numpy as np
+import question_bank
+
+# Items need this many responses before their statistics are trusted
+MIN_RESPONSES = 20
+# Retirement thresholds (classical test theory rules of thumb)
+MAX_P_VALUE = 0.95       # almost everyone answers correctly -> trivially easy
+MIN_P_VALUE = 0.10       # almost nobody answers correctly -> likely ambiguous or mis-keyed
+MIN_DISCRIMINATION = 0.10
+
+def compute_item_statistics(question_ids, attempt_ids, correct, times):
+    """Compute per-question difficulty, discrimination and median time in batched passes
+
+    Discrimination is the corrected point-biserial correlation between answering an item
+    correctly and the candidate's proportion correct on the rest of their attempt.
+    """
+    question_ids = np.asarray(question_ids)
+    attempt_ids = np.asarray(attempt_ids)
+    correct = np.asarray(correct, dtype=float)
+    times = np.asarray(times, dtype=float)
+
+    items, q_idx = np.unique(question_ids, return_inverse=True)
+    _, a_idx = np.unique(attempt_ids, return_inverse=True)
+    n_items = len(items)
+
+    # Rest score: attempt proportion correct excluding the item itself
+    attempt_correct = np.bincount(a_idx, weights=correct)
+    attempt_len = np.bincount(a_idx).astype(float)
+    rest_len = attempt_len[a_idx] - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rest = np.where(rest_len > 0, (attempt_correct[a_idx] - correct) / rest_len, 0.0)
+
+    # Grouped sums for p-value and Pearson correlation
+    n = np.bincount(q_idx, minlength=n_items).astype(float)
+    sx = np.bincount(q_idx, weights=correct, minlength=n_items)
+    sy = np.bincount(q_idx, weights=rest, minlength=n_items)
+    sxx = np.bincount(q_idx, weights=correct * correct, minlength=n_items)
+    syy = np.bincount(q_idx, weights=rest * rest, minlength=n_items)
+    sxy = np.bincount(q_idx, weights=correct * rest, minlength=n_items)
+
+    p_value = sx / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denom = np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+        discrimination = np.where(denom > 0, (n * sxy - sx * sy) / denom, np.nan)
+
+    # Grouped median: sort by (item, time) and pick the middle of each run
+    order = np.lexsort((times, q_idx))
+    sorted_times = times[order]
+    starts = np.concatenate(([0], np.cumsum(n)[:-1])).astype(int)
+    counts = n.astype(int)
+    lower = sorted_times[starts + (counts - 1) // 2]
+    upper = sorted_times[starts + counts // 2]
+    median_time = (lower + upper) / 2
+
+    return {
+        "question_id": items,
+        "n_responses": counts,
+        "p_value": p_value,
+        "discrimination": discrimination,
+        "median_time": median_time,
+    }
+
+def flag_for_retirement(stats, min_responses=MIN_RESPONSES):
+    """Return a boolean mask of items that are too easy, too hard or non-discriminating"""
+    enough = stats["n_responses"] >= min_responses
+    too_easy = stats["p_value"] > MAX_P_VALUE
+    too_hard = stats["p_value"] < MIN_P_VALUE
+    # NaN discrimination means no variance in the item or the rest score; don't retire on that alone
+    weak = np.nan_to_num(stats["discrimination"], nan=1.0) < MIN_DISCRIMINATION
+    return enough & (too_easy | too_hard | weak)
+
+def calibrate_question_bank(min_responses=MIN_RESPONSES):
+    """Recompute item statistics over all stored responses and retire weak items"""
+    rows = question_bank.fetch_responses()
+    if not rows:
+        return None
+
+    question_ids, attempt_ids, correct, times = zip(*rows)
+    stats = compute_item_statistics(question_ids, attempt_ids, correct, times)
+    retire = flag_for_retirement(stats, min_responses)
+
+    def _nullable(value):
+        value = float(value)
+        return None if math.isnan(value) else value
+
+    updates = [
+        (int(qid), int(n), _nullable(p), _nullable(d), _nullable(m))
+        for qid, n, p, d, m in zip(
+            stats["question_id"], stats["n_responses"], stats["p_value"],
+            stats["discrimination"], stats["median_time"]
+        )
+    ]
+    retired_ids = [int(qid) for qid in stats["question_id"][retire]]
+    question_bank.update_item_statistics(updates, retired_ids)
+
+    return {"calibrated": len(updates), "retired": len(retired_ids)}
+
+if __name__ == "__main__":
+    summary = calibrate_question_bank()
+    if summary is None:
+        print("No stored responses to calibrate")
+    else:
+        print(f"Calibrated {summary['calibrated']} questions, retired {summary['retired']}")
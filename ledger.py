@@ -0,0 +1,131 @@
+import argparse
+import contextvars
+import os
+from datetime import datetime
+import question_bank
+
+# Token budgets; 0 disables a budget
+SESSION_TOKEN_BUDGET = int(os.environ.get("LEDGER_SESSION_TOKEN_BUDGET", 60000))
+DAILY_TOKEN_BUDGET = int(os.environ.get("LEDGER_DAILY_TOKEN_BUDGET", 5000000))
+# Model used for LLM calls once a budget is exhausted
+BUDGET_FALLBACK_MODEL = os.environ.get("LEDGER_BUDGET_FALLBACK_MODEL", "gpt-4o-mini")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT,
+    day TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    call_site TEXT NOT NULL,
+    role TEXT,
+    tool TEXT,
+    model TEXT,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    latency REAL NOT NULL DEFAULT 0,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    ok INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_session ON llm_calls (session_id);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_day ON llm_calls (day);
+"""
+
+# Who the current LLM call is for; set once per script run / API request
+_session = contextvars.ContextVar("ledger_session", default={})
+_schema_ready = set()
+
+def bind_session(session_id, role=None, tool=None):
+    """Attribute subsequent LLM calls in this context to a session, role and tool"""
+    _session.set({"session_id": session_id, "role": role, "tool": tool})
+
+def current_session():
+    return _session.get()
+
+def _connect():
+    conn = question_bank.get_connection()
+    if question_bank.DB_PATH not in _schema_ready:
+        conn.executescript(SCHEMA)
+        _schema_ready.add(question_bank.DB_PATH)
+    return conn
+
+def record_call(call_site, model, prompt_tokens=0, completion_tokens=0, latency=0.0, cache_hit=False, ok=True, tool=None):
+    """Append one LLM call (or cache hit) to the ledger"""
+    session = current_session()
+    now = datetime.now()
+    with _connect() as conn:
+        conn.execute(
+            """INSERT INTO llm_calls
+               (session_id, day, created_at, call_site, role, tool, model,
+                prompt_tokens, completion_tokens, latency, cache_hit, ok)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (session.get("session_id"), now.strftime("%Y-%m-%d"), now.strftime("%Y-%m-%d %H:%M:%S"),
+             call_site, session.get("role"), tool or session.get("tool"), model,
+             prompt_tokens, completion_tokens, latency, int(cache_hit), int(ok))
+        )
+
+def tokens_used(session_id=None, day=None):
+    """Total tokens spent by a session and/or on a day"""
+    clauses, params = [], []
+    if session_id is not None:
+        clauses.append("session_id = ?")
+        params.append(session_id)
+    if day is not None:
+        clauses.append("day = ?")
+        params.append(day)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with _connect() as conn:
+        row = conn.execute(
+            f"SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM llm_calls {where}",
+            params
+        ).fetchone()
+    return row[0]
+
+def over_budget():
+    """True when the current session or today's spend has reached its token budget"""
+    session_id = current_session().get("session_id")
+    if SESSION_TOKEN_BUDGET and session_id and tokens_used(session_id=session_id) >= SESSION_TOKEN_BUDGET:
+        return True
+    if DAILY_TOKEN_BUDGET and tokens_used(day=datetime.now().strftime("%Y-%m-%d")) >= DAILY_TOKEN_BUDGET:
+        return True
+    return False
+
+def aggregate_report(start_day=None, end_day=None):
+    """Cost and latency per role, tool and call site over a day range"""
+    clauses, params = [], []
+    if start_day:
+        clauses.append("day >= ?")
+        params.append(start_day)
+    if end_day:
+        clauses.append("day <= ?")
+        params.append(end_day)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with _connect() as conn:
+        return conn.execute(
+            f"""SELECT COALESCE(role, '-') AS role, COALESCE(tool, '-') AS tool, call_site,
+                       COUNT(*) AS calls,
+                       COUNT(DISTINCT session_id) AS sessions,
+                       SUM(prompt_tokens) AS prompt_tokens,
+                       SUM(completion_tokens) AS completion_tokens,
+                       AVG(CASE WHEN cache_hit = 0 THEN latency END) AS avg_latency,
+                       MAX(latency) AS max_latency,
+                       AVG(cache_hit) AS cache_hit_rate,
+                       1 - AVG(ok) AS error_rate
+                FROM llm_calls {where}
+                GROUP BY role, tool, call_site
+                ORDER BY role, tool, call_site""",
+            params
+        ).fetchall()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM token and latency report by role and tool")
+    parser.add_argument("--from", dest="start_day", help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end_day", help="Last day (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    rows = aggregate_report(args.start_day, args.end_day)
+    print(f"{'Role':<22}{'Tool':<20}{'Call site':<22}{'calls':>7}{'sessions':>9}"
+          f"{'prompt':>10}{'compl.':>9}{'avg s':>8}{'max s':>8}{'cache':>7}{'err':>6}")
+    for row in rows:
+        print(f"{row['role']:<22}{row['tool']:<20}{row['call_site']:<22}{row['calls']:>7}{row['sessions']:>9}"
+              f"{row['prompt_tokens']:>10}{row['completion_tokens']:>9}{row['avg_latency'] or 0:>8.2f}"
+              f"{row['max_latency'] or 0:>8.2f}{row['cache_hit_rate']:>7.0%}{row['error_rate']:>6.0%}")
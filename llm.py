@@ -0,0 +1,475 @@
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+import openai as openai_sdk
+from openai import OpenAI, AsyncOpenAI
+import ledger
+import deadlines
+from deadlines import DeadlineExceeded
+
+# Shared OpenAI clients for every call site (LLM_BACKEND=mock for load tests).
+# The async client is used where an in-flight request may need to be cancelled.
+# SDK retries are off: a retried timeout would overrun the clamped deadline, and hidden
+# 429 retries would delay scheduler.pause(); model tiers are the retry path instead.
+if os.environ.get("LLM_BACKEND") == "mock":
+    from mock_llm import MockOpenAI, AsyncMockOpenAI
+    openai = MockOpenAI()
+    async_openai = AsyncMockOpenAI()
+else:
+    openai = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=0)
+    async_openai = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=0)
+
+# Ordered model tiers per call site; later entries are fallbacks when a call fails or its
+# reply doesn't validate. Override with e.g. LLM_MODELS_FIRST_QUESTION="gpt-4o-mini,gpt-4o".
+# the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+DEFAULT_MODEL_TIERS = {
+    "first_question": ["gpt-4o-mini", "gpt-4o"],   # only exists to be fast
+    "remaining_questions": ["gpt-4o", "gpt-4o-mini"],
+    "cv_analysis": ["gpt-4o", "gpt-4o-mini"],
+    "notes_analysis": ["gpt-4o", "gpt-4o-mini"],
+    "regeneration": ["gpt-4o", "gpt-4o-mini"],
+}
+MODEL_TIERS = {
+    call_site: [m.strip() for m in os.environ.get(f"LLM_MODELS_{call_site.upper()}", "").split(",") if m.strip()] or models
+    for call_site, models in DEFAULT_MODEL_TIERS.items()
+}
+
+# Priority classes, lower value is served first
+PRIORITY_FIRST_QUESTION = 0     # a candidate is waiting on the progress bar
+PRIORITY_CV_ANALYSIS = 1        # blocks the profile page
+PRIORITY_REMAINING_QUESTIONS = 2
+PRIORITY_NOTES_ANALYSIS = 3     # results page
+PRIORITY_REGENERATION = 4       # background question replacement, no one waiting
+
+PRIORITY_NAMES = {
+    PRIORITY_FIRST_QUESTION: "first_question",
+    PRIORITY_CV_ANALYSIS: "cv_analysis",
+    PRIORITY_REMAINING_QUESTIONS: "remaining_questions",
+    PRIORITY_NOTES_ANALYSIS: "notes_analysis",
+    PRIORITY_REGENERATION: "regeneration",
+}
+
+# Process-wide budgets (keep below the provider's account limits)
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 8))
+REQUESTS_PER_MINUTE = int(os.environ.get("LLM_REQUESTS_PER_MINUTE", 400))
+TOKENS_PER_MINUTE = int(os.environ.get("LLM_TOKENS_PER_MINUTE", 200000))
+# Callers below the top priority are rejected once this many requests are queued
+MAX_QUEUE_DEPTH = int(os.environ.get("LLM_MAX_QUEUE_DEPTH", 50))
+# How long a queued request waits for a slot before giving up
+QUEUE_TIMEOUT = float(os.environ.get("LLM_QUEUE_TIMEOUT", 60))
+# Pause after the provider answers 429
+RATE_LIMIT_BACKOFF = float(os.environ.get("LLM_RATE_LIMIT_BACKOFF", 5))
+
+# Hedged requests: send a duplicate once the first passes the observed latency percentile
+HEDGE_ENABLED = os.environ.get("LLM_HEDGE_ENABLED", "1") == "1"
+HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", 90))
+# Used until enough latencies are observed, and as a floor for the adaptive threshold
+HEDGE_DEFAULT_DELAY = float(os.environ.get("LLM_HEDGE_DEFAULT_DELAY", 8))
+HEDGE_MIN_DELAY = float(os.environ.get("LLM_HEDGE_MIN_DELAY", 2))
+HEDGE_MIN_SAMPLES = 20
+# Hedges allowed per primary request (0.1 = at most ~10% extra calls), with a burst cap
+HEDGE_BUDGET_RATIO = float(os.environ.get("LLM_HEDGE_BUDGET_RATIO", 0.1))
+HEDGE_BUDGET_BURST = float(os.environ.get("LLM_HEDGE_BUDGET_BURST", 5))
+
+class SchedulerOverloaded(Exception):
+    """Raised when a request is refused admission or waits too long for a slot"""
+
+class LLMScheduler:
+    """Priority queue in front of the LLM provider with concurrency, request and token budgets"""
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE,
+                 tokens_per_minute=TOKENS_PER_MINUTE, max_queue_depth=MAX_QUEUE_DEPTH):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue_depth = max_queue_depth
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        # (timestamp, tokens) for calls started in the last minute
+        self._window = deque()
+        self._window_tokens = 0
+
+        self._admitted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self._rejected = {name: 0 for name in PRIORITY_NAMES.values()}
+        self._wait_total = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self._wait_max = {name: 0.0 for name in PRIORITY_NAMES.values()}
+
+    def _prune_window(self, now):
+        while self._window and now - self._window[0][0] >= 60:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    def _budget_wait(self, now, tokens):
+        """Seconds until a call of this size fits the budgets, 0 if it fits now"""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= self.max_concurrency:
+            return None  # woken up by release()
+        self._prune_window(now)
+        if len(self._window) >= self.requests_per_minute:
+            return 60 - (now - self._window[0][0])
+        # A single oversized call is admitted on an empty window instead of waiting forever
+        if self._window and self._window_tokens + tokens > self.tokens_per_minute:
+            return 60 - (now - self._window[0][0])
+        return 0
+
+    def acquire(self, priority, tokens, timeout=QUEUE_TIMEOUT):
+        """Block until this request may call the provider; returns a ticket for release()"""
+        name = PRIORITY_NAMES[priority]
+        enqueued = time.monotonic()
+        deadline = enqueued + timeout
+
+        with self._cond:
+            if priority != PRIORITY_FIRST_QUESTION and len(self._queue) >= self.max_queue_depth:
+                self._rejected[name] += 1
+                raise SchedulerOverloaded("The interview service is busy, please try again shortly")
+
+            ticket = [priority, next(self._seq), tokens]
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._queue[0] is ticket:
+                        wait = self._budget_wait(now, tokens)
+                        if wait == 0:
+                            break
+                    else:
+                        wait = None
+                    if now >= deadline:
+                        self._rejected[name] += 1
+                        raise SchedulerOverloaded("Timed out waiting for an LLM slot")
+                    remaining = deadline - now
+                    self._cond.wait(remaining if wait is None else min(wait, remaining))
+            except BaseException:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+                raise
+
+            heapq.heappop(self._queue)
+            self._in_flight += 1
+            self._window.append((now, tokens))
+            self._window_tokens += tokens
+
+            waited = now - enqueued
+            self._admitted[name] += 1
+            self._wait_total[name] += waited
+            self._wait_max[name] = max(self._wait_max[name], waited)
+            self._cond.notify_all()
+            return self._window[-1]
+
+    def release(self, ticket, actual_tokens=None):
+        """Free the slot and correct the token window with the real usage"""
+        with self._cond:
+            self._in_flight -= 1
+            if actual_tokens is not None:
+                # The window entry may already have aged out
+                for i, entry in enumerate(self._window):
+                    if entry is ticket:
+                        self._window[i] = (ticket[0], actual_tokens)
+                        self._window_tokens += actual_tokens - ticket[1]
+                        break
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        """Stop admitting requests for a while (e.g. after a 429)"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def get_metrics(self):
+        """Snapshot of queue depth, in-flight calls, budgets and per-priority counters"""
+        with self._cond:
+            self._prune_window(time.monotonic())
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _, _ in self._queue:
+                depth[PRIORITY_NAMES[priority]] += 1
+            return {
+                "queue_depth": len(self._queue),
+                "queue_depth_by_priority": depth,
+                "in_flight": self._in_flight,
+                "requests_last_minute": len(self._window),
+                "tokens_last_minute": self._window_tokens,
+                "admitted": dict(self._admitted),
+                "rejected": dict(self._rejected),
+                "avg_wait": {
+                    name: self._wait_total[name] / count if count else 0.0
+                    for name, count in self._admitted.items()
+                },
+                "max_wait": dict(self._wait_max),
+            }
+
+scheduler = LLMScheduler()
+
+def estimate_tokens(messages, max_completion_tokens=1500):
+    """Rough token estimate (~4 characters per token) used for budgeting before the call"""
+    prompt_chars = sum(len(message["content"]) for message in messages)
+    return prompt_chars // 4 + max_completion_tokens
+
+def _record(call_site, model, response, latency, ok, tool):
+    """Write the call to the token ledger without ever failing the request"""
+    usage = getattr(response, "usage", None)
+    try:
+        ledger.record_call(
+            call_site, model,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            latency=latency, ok=ok, tool=tool
+        )
+    except Exception:
+        pass
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per call site"""
+
+    def __init__(self, size=200):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._size = size
+
+    def observe(self, call_site, latency):
+        with self._lock:
+            self._samples.setdefault(call_site, deque(maxlen=self._size)).append(latency)
+
+    def percentile(self, call_site, pct):
+        """Latency percentile, or None until HEDGE_MIN_SAMPLES calls were observed"""
+        with self._lock:
+            samples = sorted(self._samples.get(call_site, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+class HedgeBudget:
+    """Earns HEDGE_BUDGET_RATIO credits per primary request; each hedge spends one"""
+
+    def __init__(self, ratio=HEDGE_BUDGET_RATIO, burst=HEDGE_BUDGET_BURST):
+        self._lock = threading.Lock()
+        self.ratio = ratio
+        self.burst = burst
+        self._credits = burst
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.denied = 0
+
+    def earn(self):
+        with self._lock:
+            self._credits = min(self.burst, self._credits + self.ratio)
+
+    def try_spend(self):
+        with self._lock:
+            if self._credits >= 1:
+                self._credits -= 1
+                self.hedged += 1
+                return True
+            self.denied += 1
+            return False
+
+    def record_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def get_metrics(self):
+        with self._lock:
+            return {"hedged": self.hedged, "hedge_wins": self.hedge_wins,
+                    "denied": self.denied, "credits": self._credits}
+
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget()
+
+def hedge_delay(call_site):
+    """Adaptive threshold after which a duplicate request is sent"""
+    observed = latency_tracker.percentile(call_site, HEDGE_PERCENTILE)
+    if observed is None:
+        return HEDGE_DEFAULT_DELAY
+    return max(HEDGE_MIN_DELAY, observed)
+
+def _apply_budget_model(kwargs):
+    # Over budget: keep serving, but on the cheaper model
+    try:
+        if ledger.over_budget():
+            kwargs["model"] = ledger.BUDGET_FALLBACK_MODEL
+    except Exception:
+        pass
+
+def _apply_deadline(kwargs):
+    """Clamp the request timeout to the current deadline; returns the queue wait limit"""
+    deadlines.check()
+    left = deadlines.remaining()
+    if left is None:
+        return QUEUE_TIMEOUT
+    kwargs["timeout"] = min(kwargs.get("timeout") or left, left)
+    return min(QUEUE_TIMEOUT, left)
+
+def chat_completion(priority, tool=None, on_call=None, **kwargs):
+    """Create a chat completion through the process-wide scheduler and record it in the ledger
+
+    `on_call(call_site, model, response, latency, ok, tool)` replaces the ledger write, for
+    calls made on behalf of several sessions that each record their own share.
+    """
+    call_site = PRIORITY_NAMES[priority]
+    _apply_budget_model(kwargs)
+    queue_timeout = _apply_deadline(kwargs)
+
+    ticket = scheduler.acquire(priority, estimate_tokens(kwargs["messages"]), timeout=queue_timeout)
+    actual_tokens = None
+    response = None
+    started = time.perf_counter()
+    try:
+        response = openai.chat.completions.create(**kwargs)
+        if response.usage is not None:
+            actual_tokens = response.usage.total_tokens
+        latency_tracker.observe(call_site, time.perf_counter() - started)
+        return response
+    except openai_sdk.RateLimitError:
+        scheduler.pause(RATE_LIMIT_BACKOFF)
+        raise
+    finally:
+        scheduler.release(ticket, actual_tokens)
+        (on_call or _record)(call_site, kwargs["model"], response, time.perf_counter() - started,
+                             response is not None, tool)
+
+def _release_when_acquired(acquire_future):
+    """Give back a scheduler slot that was granted after its request was cancelled"""
+    def release(future):
+        if not future.cancelled() and future.exception() is None:
+            scheduler.release(future.result())
+    acquire_future.add_done_callback(release)
+
+async def _attempt(priority, parse, tool, kwargs, queue_timeout, admitted=None):
+    """One scheduled async request; returns the parsed, validated result. `admitted` is set
+    once the scheduler grants the request a slot"""
+    call_site = PRIORITY_NAMES[priority]
+    acquire_future = asyncio.ensure_future(
+        asyncio.to_thread(scheduler.acquire, priority, estimate_tokens(kwargs["messages"]), queue_timeout)
+    )
+    try:
+        ticket = await asyncio.shield(acquire_future)
+    except asyncio.CancelledError:
+        _release_when_acquired(acquire_future)
+        raise
+    if admitted is not None:
+        admitted.set()
+
+    actual_tokens = None
+    response = None
+    cancelled = False
+    started = time.perf_counter()
+    try:
+        response = await async_openai.chat.completions.create(**kwargs)
+        if response.usage is not None:
+            actual_tokens = response.usage.total_tokens
+        latency_tracker.observe(call_site, time.perf_counter() - started)
+    except asyncio.CancelledError:
+        # The losing side of a hedge; it didn't fail, so keep it out of the error rate
+        cancelled = True
+        raise
+    except openai_sdk.RateLimitError:
+        scheduler.pause(RATE_LIMIT_BACKOFF)
+        raise
+    finally:
+        scheduler.release(ticket, actual_tokens)
+        if not cancelled:
+            # The ledger write blocks on SQLite; keep it off the shared event loop
+            await asyncio.to_thread(_record, call_site, kwargs["model"], response,
+                                    time.perf_counter() - started, response is not None, tool)
+    return parse(response)
+
+async def _hedged(priority, parse, tool, kwargs, queue_timeout):
+    admitted = asyncio.Event()
+    primary = asyncio.create_task(_attempt(priority, parse, tool, kwargs, queue_timeout, admitted))
+    admission = asyncio.create_task(admitted.wait())
+    tasks = {primary}
+    error = None
+    try:
+        # The p90 threshold tracks provider latency only, so start the hedge clock once the
+        # primary has a slot; a hedge sent while it queues would just queue behind it
+        await asyncio.wait({primary, admission}, return_when=asyncio.FIRST_COMPLETED)
+        primary_started = time.perf_counter()
+        if not primary.done():
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay(PRIORITY_NAMES[priority]))
+            if not done and hedge_budget.try_spend():
+                tasks.add(asyncio.create_task(_attempt(priority, parse, tool, dict(kwargs), queue_timeout)))
+
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        hedge_budget.record_win()
+                        if not primary.done():
+                            # The slow primary is about to be cancelled; keep it in the window
+                            # (as a lower bound) so the tail the hedge cut off still moves p90
+                            latency_tracker.observe(PRIORITY_NAMES[priority], time.perf_counter() - primary_started)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        admission.cancel()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+_loop = None
+_loop_lock = threading.Lock()
+
+def _get_loop():
+    """Background event loop shared by async requests, so the async client keeps its connections"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-async", daemon=True).start()
+    return _loop
+
+async def _run_in_session(session, coro):
+    # The loop thread has its own context; carry the ledger attribution over
+    if session:
+        ledger.bind_session(**session)
+    return await coro
+
+def hedged_chat_completion(priority, parse, tool=None, **kwargs):
+    """Chat completion that sends one duplicate request if the first is slower than the
+    adaptive threshold; returns parse(response) of the first valid reply and cancels the other"""
+    _apply_budget_model(kwargs)
+    # The loop thread doesn't see this context's deadline, so pass the limits explicitly
+    queue_timeout = _apply_deadline(kwargs)
+    hedge_budget.earn()
+    coro = _run_in_session(ledger.current_session(), _hedged(priority, parse, tool, kwargs, queue_timeout))
+    future = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    try:
+        return future.result(timeout=deadlines.remaining())
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise DeadlineExceeded("Deadline reached while waiting for the first question")
+
+def structured_completion(priority, parse, tool=None, hedge=False, on_call=None, **kwargs):
+    """Try the call site's model tiers in order and return parse(response) from the first
+    model whose reply arrives and validates; raises DeadlineExceeded once the deadline
+    leaves no room for another attempt. `on_call` is passed to chat_completion (unhedged calls)"""
+    models = MODEL_TIERS[PRIORITY_NAMES[priority]]
+    error = None
+    for model in models:
+        try:
+            if hedge and HEDGE_ENABLED:
+                return hedged_chat_completion(priority, parse, tool=tool, model=model, **kwargs)
+            return parse(chat_completion(priority, tool=tool, on_call=on_call, model=model, **kwargs))
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # Timeouts and queue waits cut short by the deadline surface as DeadlineExceeded
+            if deadlines.nearly_expired():
+                raise DeadlineExceeded(f"Deadline reached: {str(e)}") from e
+            if isinstance(e, SchedulerOverloaded):
+                # Our own admission control; another model won't get a slot either
+                raise
+            error = e
+    raise error
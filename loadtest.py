@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import pytz
+
+TRANSITIONS = ["welcome", "passcode", "profile", "cv_analysis", "start_interview",
+               "generate_questions", "question", "results"]
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+def _timed(timings, name, action):
+    start = time.perf_counter()
+    at = action()
+    timings.setdefault(name, []).append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(f"{name} failed: {at.exception[0].message}")
+    return at
+
+def _button(at, label):
+    for button in at.button:
+        if button.label == label:
+            return button
+    raise RuntimeError(f"Button '{label}' not found on page")
+
+def simulate_candidate(timings):
+    """Drive one candidate through welcome -> profile -> interview -> results"""
+    from streamlit.testing.v1 import AppTest
+    import cv_analysis
+
+    at = AppTest.from_file("main.py", default_timeout=120)
+    _timed(timings, "welcome", at.run)
+
+    passcode = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%d%m%y')
+    at.text_input[0].input(passcode)
+    _timed(timings, "passcode", at.run)
+    _timed(timings, "profile", _button(at, "BEGIN ASSESSMENT").click().run)
+
+    # AppTest cannot drive st.file_uploader, so run the CV analysis directly and
+    # seed the state the upload branch would have set (verification animations skipped)
+    def analyze():
+        analysis = cv_analysis.analyze_cv("Mock CV text for load testing")
+        at.session_state.candidate_name = analysis["candidate_name"]
+        at.session_state.suggested_role = analysis["suggested_role"]
+        at.session_state.recommended_languages = analysis["recommended_languages"]
+        at.session_state.cv_analysis = analysis
+        at.session_state.suggested_difficulty = "Medium"
+        at.session_state.cv_uploaded = True
+        at.session_state.verification_shown = True
+        return at.run()
+    _timed(timings, "cv_analysis", analyze)
+
+    _timed(timings, "start_interview", _button(at, "Start Technical Interview").click().run)
+    _timed(timings, "generate_questions", _button(at, "Begin Interview").click().run)
+
+    for i in range(10):
+        at.radio[0].set_value(at.radio[0].options[0])
+        label = "Next Question" if i < 9 else "Finish Interview"
+        if i < 9:
+            _timed(timings, "question", _button(at, label).click().run)
+        else:
+            _timed(timings, "results", _button(at, label).click().run)
+
+def run_worker(candidates):
+    """Run candidates sequentially in one process and report timings and resource usage"""
+    timings = {}
+    failures = 0
+    for _ in range(candidates):
+        try:
+            simulate_candidate(timings)
+        except Exception as e:
+            failures += 1
+            print(f"Candidate failed: {str(e)}")
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "timings": timings,
+        "failures": failures,
+        "cpu_seconds": usage.ru_utime + usage.ru_stime,
+        "max_rss_mb": usage.ru_maxrss / 1024,
+    }
+
+def run_load_test(candidates, concurrency):
+    """Run `candidates` simulated interviews across `concurrency` worker processes"""
+    per_worker = [candidates // concurrency + (1 if i < candidates % concurrency else 0)
+                  for i in range(concurrency)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(run_worker, [n for n in per_worker if n]))
+    wall = time.perf_counter() - started
+
+    timings = {}
+    for result in results:
+        for name, values in result["timings"].items():
+            timings.setdefault(name, []).extend(values)
+
+    return {
+        "candidates": candidates,
+        "concurrency": concurrency,
+        "wall_seconds": wall,
+        "interviews_per_minute": 60 * (candidates - sum(r["failures"] for r in results)) / wall,
+        "failures": sum(r["failures"] for r in results),
+        "cpu_seconds": sum(r["cpu_seconds"] for r in results),
+        "max_rss_mb": max(r["max_rss_mb"] for r in results),
+        "transitions": {
+            name: {
+                "count": len(timings[name]),
+                "p50": _percentile(timings[name], 50),
+                "p90": _percentile(timings[name], 90),
+                "p99": _percentile(timings[name], 99),
+                "max": max(timings[name]),
+            }
+            for name in TRANSITIONS if name in timings
+        },
+    }
+
+def print_report(report):
+    print(f"Candidates: {report['candidates']}  Concurrency: {report['concurrency']}  "
+          f"Failures: {report['failures']}")
+    print(f"Wall: {report['wall_seconds']:.1f}s  Throughput: {report['interviews_per_minute']:.1f} interviews/min")
+    print(f"CPU: {report['cpu_seconds']:.1f}s  Peak RSS per process: {report['max_rss_mb']:.0f} MB")
+    print(f"{'Transition':<20}{'count':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for name, stats in report["transitions"].items():
+        print(f"{name:<20}{stats['count']:>7}{stats['p50']:>9.3f}{stats['p90']:>9.3f}"
+              f"{stats['p99']:>9.3f}{stats['max']:>9.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated-candidate load test for the interview flow")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mean mock LLM latency in seconds")
+    parser.add_argument("--output", help="Write the JSON report here for release-over-release comparison")
+    args = parser.parse_args()
+
+    # Configure before worker processes import the app
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    os.environ["LLM_BACKEND"] = "mock"
+    os.environ["MOCK_LLM_LATENCY"] = str(args.llm_latency)
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    with tempfile.TemporaryDirectory(prefix="loadtest_") as scratch:
+        # Always a scratch bank and session store: mock questions, attempts and ledger rows
+        # must never reach a configured production database or its daily token budget
+        os.environ["QUESTION_BANK_PATH"] = os.path.join(scratch, "interview_data.db")
+        os.environ["SESSION_BACKEND"] = "sqlite"
+        os.environ["SESSION_DB_PATH"] = os.path.join(scratch, "sessions.db")
+        report = run_load_test(args.candidates, args.concurrency)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
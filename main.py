@@ -2,18 +2,16 @@ import streamlit as st
 import time
 from quiz_generator import generate_questions
 from analytics import generate_analytics
-import json
 import uuid
 import pandas as pd
 from datetime import datetime
-import PyPDF2
-import io
-import os
-from openai import OpenAI
 import pytz #Import pytz library
-
-# Initialize OpenAI client
-openai = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+import cv_analysis
+from roles import TECH_ROLES
+import ledger
+import deadlines
+import render_metrics
+from session_store import get_session_store, serialize_state, deserialize_state
 
 # Page configuration
 st.set_page_config(
@@ -45,129 +43,58 @@ def initialize_session_state():
         'page': 'welcome'  # New state variable to track current page
     }
 
+    # A fresh script session (restart, deploy or another node) resumes by candidate ID
+    if 'candidate_id' not in st.session_state:
+        restore_session_state(st.query_params.get("candidate"))
+
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
+    st.query_params["candidate"] = st.session_state.candidate_id
+
+def restore_session_state(candidate_id):
+    """Load persisted interview state for a candidate, if any"""
+    if not candidate_id:
+        return
+    try:
+        payload = get_session_store().load(candidate_id)
+    except Exception as e:
+        st.warning(f"Could not restore session: {str(e)}")
+        return
+    if payload:
+        for key, value in deserialize_state(payload).items():
+            st.session_state[key] = value
+        st.session_state._persisted_payload = payload
+
+def persist_session_state():
+    """Save interview state to the session store when it has changed"""
+    # Nothing worth resuming before the passcode; visitors and health checks leave no row
+    if st.session_state.get('page', 'welcome') == 'welcome':
+        return
+    payload = serialize_state(st.session_state)
+    if payload == st.session_state.get('_persisted_payload'):
+        return
+    try:
+        get_session_store().save(st.session_state.candidate_id, payload)
+        st.session_state._persisted_payload = payload
+    except Exception as e:
+        st.warning(f"Could not save session: {str(e)}")
+
 def reset_session():
     """Reset all session state variables"""
+    try:
+        get_session_store().delete(st.session_state.candidate_id)
+    except Exception:
+        pass
     for key in list(st.session_state.keys()):
         del st.session_state[key]
     initialize_session_state()
 
-# Tech roles configuration
-TECH_ROLES = {
-    "Frontend Developer": {
-        "languages": ["JavaScript", "TypeScript", "React", "Angular", "Vue.js"],
-        "difficulty": "Medium",
-        "keywords": ["react", "angular", "vue", "html", "css", "frontend", "ui", "ux"]
-    },
-    "Backend Developer": {
-        "languages": ["Python", "Java", "Go", "Node.js", "Ruby"],
-        "difficulty": "Hard",
-        "keywords": ["backend", "api", "database", "server", "django", "spring", "golang"]
-    },
-    "Full Stack Developer": {
-        "languages": ["JavaScript", "Python", "Java", "TypeScript", "PHP"],
-        "difficulty": "Hard",
-        "keywords": ["fullstack", "full-stack", "frontend", "backend", "web"]
-    },
-    "DevOps Engineer": {
-        "languages": ["Terraform", "Kubernetes", "Docker", "Jenkins", "Ansible"],
-        "difficulty": "Medium",
-        "keywords": ["devops", "ci/cd", "aws", "docker", "kubernetes", "infrastructure"]
-    },
-    "Mobile Developer": {
-        "languages": ["Swift", "Kotlin", "React Native", "Flutter", "Android Studio"],
-        "difficulty": "Medium",
-        "keywords": ["mobile", "android", "ios", "react native", "flutter"]
-    },
-    "Product Manager": {
-        "languages": ["JIRA", "Confluence", "Product Vision", "Roadmap", "User Stories"],
-        "difficulty": "Medium",
-        "keywords": ["product", "agile", "scrum", "jira", "miro", "roadmap", "user stories", "backlog"]
-    },
-    "Salesforce Developer": {
-        "languages": ["Apex", "Lightning Web Components", "Visualforce", "SOQL", "Flow Builder"],
-        "difficulty": "Medium",
-        "keywords": ["salesforce", "apex", "lwc", "visualforce", "soql", "crm"]
-    },
-    "AWS Cloud Engineer": {
-        "languages": ["AWS CLI", "CloudFormation", "Lambda", "EC2", "S3"],
-        "difficulty": "Hard",
-        "keywords": ["aws", "cloud", "ec2", "s3", "lambda", "cloudformation"]
-    },
-    "Azure Developer": {
-        "languages": ["Azure CLI", "ARM Templates", "Azure Functions", "Azure DevOps", "Power Platform"],
-        "difficulty": "Hard",
-        "keywords": ["azure", "cloud", "functions", "devops", "power apps"]
-    },
-    "Google Cloud Expert": {
-        "languages": ["Google Cloud SDK", "Cloud Functions", "BigQuery", "Kubernetes Engine", "App Engine"],
-        "difficulty": "Hard",
-        "keywords": ["gcp", "google cloud", "bigquery", "kubernetes", "app engine"]
-    },
-    "Data Scientist": {
-        "languages": ["Python", "R", "TensorFlow", "PyTorch", "Scikit-learn"],
-        "difficulty": "Hard",
-        "keywords": ["data science", "machine learning", "ai", "statistics", "deep learning"]
-    },
-    "Business Analyst": {
-        "languages": ["SQL", "Excel", "Tableau", "Power BI", "BPMN"],
-        "difficulty": "Medium",
-        "keywords": ["business analysis", "requirements", "process modeling", "data analysis"]
-    },
-    "QA Engineer": {
-        "languages": ["Selenium", "Cypress", "JUnit", "TestNG", "Postman"],
-        "difficulty": "Medium",
-        "keywords": ["testing", "automation", "quality assurance", "test cases"]
-    }
-}
-
 def analyze_cv(cv_content):
     """Analyze CV content and suggest a role"""
     try:
-        prompt = f"""Analyze this CV and extract the following information with high attention to detail:
-        1. The candidate's full name from the CV
-        2. The most appropriate technical role from these options: {', '.join(TECH_ROLES.keys())}
-        3. Analyze work experience holistically:
-           - Consider all professional experience in the CV
-           - Include relevant projects and contributions
-           - Consider depth and breadth of experience
-           - Provide total years of experience as a single number or range (e.g. "5 years" or "4-5 years")
-        4. Extract education details, including degree and institution
-        5. List key technical and soft skills with confidence levels
-        6. For the selected role, identify the most relevant programming languages or tools
-
-        CV Content:
-        {cv_content}
-
-        Respond in JSON format with:
-        {{
-            "candidate_name": "full name from CV",
-            "suggested_role": "one of the roles listed above",
-            "confidence": "score between 0 and 1",
-            "reasoning": "brief explanation for the suggestion",
-            "education": "detailed education background",
-            "key_skills": ["list of key technical and soft skills"],
-            "recommended_languages": ["list of relevant programming languages"],
-            "years_of_experience": "total years of experience"
-        }}
-        """
-
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
-
-        analysis = json.loads(response.choices[0].message.content)
-
-        # Filter languages based on the suggested role
-        role_languages = TECH_ROLES[analysis["suggested_role"]]["languages"]
-        analysis["recommended_languages"] = [lang for lang in analysis["recommended_languages"] if lang in role_languages]
-
-        return analysis
+        return cv_analysis.analyze_cv(cv_content)
     except Exception as e:
         st.error(f"Error analyzing CV: {str(e)}")
         return None
@@ -175,12 +102,7 @@ def analyze_cv(cv_content):
 def extract_text_from_pdf(pdf_bytes):
     """Extract text content from uploaded PDF"""
     try:
-        pdf_file = io.BytesIO(pdf_bytes)
-        reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-        return text
+        return cv_analysis.extract_text_from_pdf(pdf_bytes)
     except Exception as e:
         st.error(f"Error reading PDF: {str(e)}")
         return None
@@ -291,6 +213,8 @@ def collect_candidate_info():
                         # Display analysis results and verifications in persistent container
                         with persisted_content.container():
                             st.success("✅ CV Analysis Complete!")
+                            if analysis.get("analysis_source") == "keywords":
+                                st.warning("AI analysis took too long, so the role was suggested from CV keywords. Please review it below.")
                             # Show verifications first
                             show_verification_animations()
 
@@ -451,8 +375,8 @@ def show_interview_page():
                     if questions:
                         # Update candidate_info with the selected tool
                         st.session_state.candidate_info["tool"] = tool
+                        st.session_state.candidate_info["difficulty"] = difficulty
                         st.session_state.questions = questions
-                        st.session_state.start_time = time.time()
                         st.rerun()
                     else:
                         st.error("Failed to generate questions. Please try again.")
@@ -460,39 +384,90 @@ def show_interview_page():
                         st.rerun()
 
     else:
-        # Progress bar
-        progress = (st.session_state.current_question) / len(st.session_state.questions)
-        st.progress(progress)
+        show_question_panel()
+
+def bind_ledger_session():
+    """Attribute LLM calls and timings made in this run to the candidate"""
+    ledger.bind_session(
+        st.session_state.candidate_id,
+        role=st.session_state.candidate_info.get("role"),
+        tool=st.session_state.candidate_info.get("tool")
+    )
+
+def think_time(now):
+    """Seconds the candidate has had the current question on screen"""
+    shown_at = st.session_state.get('_question_shown_at')
+    if shown_at is None:
+        # Session resumed in another process: monotonic clocks don't carry over
+        return time.time() - st.session_state.start_time
+    return now - shown_at
+
+def mark_question_shown(i):
+    """Start the candidate's clock once question i has rendered and record the render time"""
+    shown_at = time.monotonic()
+    st.session_state._question_shown_at = shown_at
+    st.session_state.start_time = time.time()
+    st.session_state.shown_question = i
+    render_metrics.render_times.observe(shown_at - st.session_state.get("_run_started", shown_at))
+
+def submit_answer():
+    """Record the current answer; runs as the form's on_click callback before the rerun"""
+    now = time.monotonic()
+    # Fragment reruns start here instead of in main()
+    st.session_state._run_started = now
+    bind_ledger_session()
+
+    i = st.session_state.current_question
+    st.session_state.answers.append(st.session_state[f"answer_{i}"])
+    st.session_state.times.append(think_time(now))
+    st.session_state.notes.append(st.session_state[f"notes_{i}"])
+
+    if i < 9:
+        st.session_state.current_question += 1
+    else:
+        st.session_state.quiz_completed = True
+        st.session_state.page = 'results'
+
+@st.fragment
+def show_question_panel():
+    """Question loop; answering reruns only this fragment, not the whole app"""
+    if st.session_state.quiz_completed:
+        # Last answer submitted from a fragment rerun: switch to the results page
+        st.rerun()
 
-        # Question display
-        question = st.session_state.questions[st.session_state.current_question]
+    i = st.session_state.current_question
+    progress = i / len(st.session_state.questions)
+    st.progress(progress)
 
-        st.subheader(f"Question {st.session_state.current_question + 1}/10")
+    # Question display
+    question = st.session_state.questions[i]
 
-        with st.form(f"question_form_{st.session_state.current_question}"):
-            st.write(question["question"])
+    st.subheader(f"Question {i + 1}/10")
 
-            selected_option = st.radio(
-                "Select your answer:",
-                question["options"]
-            )
+    with st.form(f"question_form_{i}"):
+        st.write(question["question"])
 
-            notes = st.text_area(
-                "Additional notes (optional):"
-            )
+        st.radio(
+            "Select your answer:",
+            question["options"],
+            key=f"answer_{i}"
+        )
 
-            if st.form_submit_button("Next Question" if st.session_state.current_question < 9 else "Finish Interview"):
-                st.session_state.answers.append(selected_option)
-                st.session_state.times.append(time.time() - st.session_state.start_time)
-                st.session_state.notes.append(notes)
-                st.session_state.start_time = time.time()
+        st.text_area(
+            "Additional notes (optional):",
+            key=f"notes_{i}"
+        )
 
-                if st.session_state.current_question < 9:
-                    st.session_state.current_question += 1
-                else:
-                    st.session_state.quiz_completed = True
-                    st.session_state.page = 'results'
-                st.rerun()
+        st.form_submit_button(
+            "Next Question" if i < 9 else "Finish Interview",
+            on_click=submit_answer
+        )
+
+    # Think time starts once the question has been sent; a page refresh doesn't reset it
+    if st.session_state.get('shown_question') != i:
+        mark_question_shown(i)
+    # Fragment reruns skip main(), so save progress here
+    persist_session_state()
 
 def show_results_page():
     st.title("📊 Assessment Results")
@@ -576,9 +551,20 @@ def show_verification_animations():
 
 
 def main():
+    st.session_state._run_started = time.monotonic()
     initialize_session_state()
+    bind_ledger_session()
+
+    # Page routing based on session state; st.rerun() raises, so persist in finally.
+    # LLM work on each page runs against that page's latency SLO.
+    try:
+        with deadlines.deadline_scope(deadlines.PAGE_SLOS.get(st.session_state.page)):
+            route_page()
+    finally:
+        persist_session_state()
 
-    # Page routing based on session state
+def route_page():
+    """Render the page for the current step"""
     if st.session_state.page == 'welcome':
         show_welcome_page()
     elif st.session_state.page == 'profile':
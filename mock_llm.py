@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from types import SimpleNamespace
+
+# Simulated provider latency in seconds (mean, jitter) for load tests
+MOCK_LLM_LATENCY = float(os.environ.get("MOCK_LLM_LATENCY", 0.5))
+MOCK_LLM_JITTER = float(os.environ.get("MOCK_LLM_JITTER", 0.2))
+
+def _mock_questions(count, seed_text):
+    questions = []
+    for i in range(count):
+        options = [f"Option {chr(65 + j)} for item {i + 1}" for j in range(4)]
+        questions.append({
+            "question": f"Mock question {i + 1} ({seed_text}) #{random.randrange(10**9)}",
+            "options": options,
+            "correct_answer": options[random.randrange(4)],
+            "topics": [f"topic{i % 3}"],
+        })
+    return {"questions": questions}
+
+def _mock_cv_analysis():
+    return {
+        "candidate_name": "Load Test Candidate",
+        "suggested_role": "Backend Developer",
+        "confidence": 0.8,
+        "reasoning": "Mock analysis",
+        "education": "B.Tech Computer Science",
+        "key_skills": ["Python", "APIs", "SQL"],
+        "recommended_languages": ["Python", "Go"],
+        "years_of_experience": "4 years",
+    }
+
+def _mock_notes_analysis():
+    return {
+        "key_observations": ["Mock observation"],
+        "strengths": ["Mock strength"],
+        "areas_of_improvement": ["Mock area"],
+        "role_fit": 70,
+        "recommendations": ["Mock recommendation"],
+    }
+
+def mock_response_content(messages):
+    """Build a plausible JSON reply for the app's prompts"""
+    prompt = messages[-1]["content"]
+    if "Analyze this CV" in prompt:
+        payload = _mock_cv_analysis()
+    elif "interview notes" in prompt:
+        payload = _mock_notes_analysis()
+    elif re.search(r"Section \d+:", prompt):
+        # Batched question request: one question set per section
+        payload = {
+            f"section_{number}": _mock_questions(int(count), f"section {number}")
+            for number, count in re.findall(r"Section (\d+): (\d+)", prompt)
+        }
+    else:
+        match = re.search(r"Generate (\d+)", prompt)
+        count = int(match.group(1)) if match else 1
+        payload = _mock_questions(count, prompt[:40])
+    return json.dumps(payload)
+
+def _mock_latency():
+    return max(0.0, random.gauss(MOCK_LLM_LATENCY, MOCK_LLM_JITTER))
+
+def _mock_completion(model, messages):
+    content = mock_response_content(messages)
+    prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+    completion_tokens = len(content) // 4
+    return SimpleNamespace(
+        model=model,
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        ),
+    )
+
+class _MockCompletions:
+    def create(self, model, messages, **kwargs):
+        time.sleep(_mock_latency())
+        return _mock_completion(model, messages)
+
+class _AsyncMockCompletions:
+    async def create(self, model, messages, **kwargs):
+        await asyncio.sleep(_mock_latency())
+        return _mock_completion(model, messages)
+
+class MockOpenAI:
+    """Drop-in stand-in for the OpenAI client used by load tests (LLM_BACKEND=mock)"""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=_MockCompletions())
+
+class AsyncMockOpenAI:
+    """Async counterpart of MockOpenAI"""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=_AsyncMockCompletions())
@@ -0,0 +1,333 @@
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+# Shared SQLite store for generated questions and completed attempts
+DB_PATH = os.environ.get("QUESTION_BANK_PATH", "interview_data.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tool TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    question TEXT NOT NULL,
+    options TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'active',
+    n_responses INTEGER NOT NULL DEFAULT 0,
+    p_value REAL,
+    discrimination REAL,
+    median_time REAL,
+    created_at TEXT NOT NULL,
+    calibrated_at TEXT,
+    UNIQUE (tool, difficulty, question)
+);
+CREATE INDEX IF NOT EXISTS idx_questions_key ON questions (tool, difficulty, status);
+
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidate_id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    role TEXT,
+    tool TEXT,
+    difficulty TEXT,
+    started_at TEXT,
+    score REAL,
+    avg_time REAL,
+    cv_analysis TEXT,
+    notes_analysis TEXT
+);
+
+CREATE TABLE IF NOT EXISTS responses (
+    attempt_id INTEGER NOT NULL REFERENCES attempts (id),
+    question_id INTEGER NOT NULL REFERENCES questions (id),
+    position INTEGER NOT NULL,
+    answer TEXT,
+    correct INTEGER NOT NULL,
+    time REAL NOT NULL,
+    PRIMARY KEY (attempt_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_responses_question ON responses (question_id);
+
+CREATE TABLE IF NOT EXISTS regeneration_queue (
+    question_id INTEGER PRIMARY KEY REFERENCES questions (id),
+    reason TEXT NOT NULL,
+    queued_at TEXT NOT NULL,
+    done_at TEXT
+);
+"""
+
+# Columns added after the first release: (table, column, definition)
+MIGRATIONS = [
+    ("attempts", "notes", "TEXT"),
+    ("attempts", "notes_pending", "INTEGER NOT NULL DEFAULT 0"),
+    ("questions", "topics", "TEXT NOT NULL DEFAULT '[]'"),
+    ("questions", "serve_count", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+# Full-text index over question text, options and topic tags, kept in sync by triggers.
+# Separate statements so it can be created inside the schema transaction.
+SEARCH_INDEX = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5 (
+        question, options, topics, content='questions', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS questions_fts_insert AFTER INSERT ON questions BEGIN
+        INSERT INTO questions_fts (rowid, question, options, topics)
+        VALUES (new.id, new.question, new.options, new.topics);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS questions_fts_delete AFTER DELETE ON questions BEGIN
+        INSERT INTO questions_fts (questions_fts, rowid, question, options, topics)
+        VALUES ('delete', old.id, old.question, old.options, old.topics);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS questions_fts_update AFTER UPDATE OF question, options, topics ON questions BEGIN
+        INSERT INTO questions_fts (questions_fts, rowid, question, options, topics)
+        VALUES ('delete', old.id, old.question, old.options, old.topics);
+        INSERT INTO questions_fts (rowid, question, options, topics)
+        VALUES (new.id, new.question, new.options, new.topics);
+    END""",
+    "INSERT INTO questions_fts (questions_fts) VALUES ('rebuild')",
+]
+
+# bm25 column weights: topic tags count most, options least
+SEARCH_WEIGHTS = (1.0, 0.5, 2.0)
+
+_initialized = set()
+
+def _migrate(conn):
+    for table, column, definition in MIGRATIONS:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            try:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            except sqlite3.OperationalError as e:
+                # Added by another process that opened the bank first
+                if "duplicate column name" not in str(e):
+                    raise
+
+def _create_search_index(conn):
+    # Indexes questions stored before the index existed on first use
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'questions_fts'").fetchone()
+    if not exists:
+        for statement in SEARCH_INDEX:
+            conn.execute(statement)
+
+def _create_schema(conn):
+    # Processes opening a fresh bank at once queue on the write lock, so each check-then-create
+    # sees the work of the ones before it (executescript would commit the lock away, hence one script)
+    conn.executescript("BEGIN IMMEDIATE;" + SCHEMA)
+    try:
+        _migrate(conn)
+        _create_search_index(conn)
+        conn.commit()
+    except:
+        conn.rollback()
+        raise
+
+def get_connection():
+    """Open a connection to the question bank, creating the schema on first use"""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    if DB_PATH not in _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _create_schema(conn)
+        _initialized.add(DB_PATH)
+    return conn
+
+def add_questions(tool, difficulty, questions):
+    """Store generated questions and tag each question dict with its bank id"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_connection() as conn:
+        for question in questions:
+            conn.execute(
+                """INSERT OR IGNORE INTO questions
+                   (tool, difficulty, question, options, correct_answer, topics, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (tool, difficulty, question["question"], json.dumps(question["options"]),
+                 question["correct_answer"], json.dumps(question.get("topics", [])), now)
+            )
+            row = conn.execute(
+                "SELECT id FROM questions WHERE tool = ? AND difficulty = ? AND question = ?",
+                (tool, difficulty, question["question"])
+            ).fetchone()
+            question["id"] = row["id"]
+    return questions
+
+def exposure_counts(tool, difficulty):
+    """(id, serve_count, created_at) for every active question of a tool and difficulty"""
+    with get_connection() as conn:
+        return conn.execute(
+            """SELECT id, serve_count, created_at FROM questions
+               WHERE tool = ? AND difficulty = ? AND status = 'active'""",
+            (tool, difficulty)
+        ).fetchall()
+
+def exposure_state(ids):
+    """(id, serve_count, created_at, status) for specific questions"""
+    ids = list(ids)
+    placeholders = ", ".join("?" for _ in ids)
+    with get_connection() as conn:
+        return conn.execute(
+            f"SELECT id, serve_count, created_at, status FROM questions WHERE id IN ({placeholders})",
+            ids
+        ).fetchall()
+
+def get_questions(ids):
+    """Active questions by id, in the order given"""
+    ids = list(ids)
+    placeholders = ", ".join("?" for _ in ids)
+    with get_connection() as conn:
+        rows = conn.execute(
+            f"""SELECT id, question, options, correct_answer FROM questions
+                WHERE id IN ({placeholders}) AND status = 'active'""",
+            ids
+        ).fetchall()
+    by_id = {
+        row["id"]: {
+            "id": row["id"],
+            "question": row["question"],
+            "options": json.loads(row["options"]),
+            "correct_answer": row["correct_answer"],
+        }
+        for row in rows
+    }
+    return [by_id[qid] for qid in ids if qid in by_id]
+
+def record_serves(ids):
+    """Count one more exposure for each served question"""
+    with get_connection() as conn:
+        conn.executemany("UPDATE questions SET serve_count = serve_count + 1 WHERE id = ?", [(qid,) for qid in ids])
+
+def queue_regeneration(ids, reason):
+    """Queue questions for replacement by the regeneration worker (once each)"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_connection() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO regeneration_queue (question_id, reason, queued_at) VALUES (?, ?, ?)",
+            [(qid, reason, now) for qid in ids]
+        )
+
+def pending_regenerations(limit=100):
+    """Queued questions that still need a replacement"""
+    with get_connection() as conn:
+        return conn.execute(
+            """SELECT r.question_id, r.reason, q.tool, q.difficulty, q.topics
+               FROM regeneration_queue r JOIN questions q ON q.id = r.question_id
+               WHERE r.done_at IS NULL
+               ORDER BY r.queued_at LIMIT ?""",
+            (limit,)
+        ).fetchall()
+
+def complete_regeneration(ids):
+    """Retire replaced questions and close their queue entries"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_connection() as conn:
+        conn.executemany("UPDATE questions SET status = 'retired' WHERE id = ?", [(qid,) for qid in ids])
+        conn.executemany(
+            "UPDATE regeneration_queue SET done_at = ? WHERE question_id = ?",
+            [(now, qid) for qid in ids]
+        )
+
+def _match_expression(topic):
+    # Quote every word so user input can't inject FTS5 operators; all words must match
+    words = re.findall(r"\w+", topic)
+    return " ".join(f'"{word}"' for word in words) if words else None
+
+def search_candidates(tool, difficulty, topics, limit, exclude_ids=()):
+    """Best-matching active questions for each topic, best first (one list per topic)"""
+    exclude_ids = list(exclude_ids)
+    placeholders = ", ".join("?" for _ in exclude_ids)
+    ranked = []
+    with get_connection() as conn:
+        for topic in topics:
+            expression = _match_expression(topic)
+            if expression is None:
+                continue
+            rows = conn.execute(
+                f"""SELECT q.id, q.question, q.options, q.correct_answer, q.topics
+                    FROM questions_fts
+                    JOIN questions q ON q.id = questions_fts.rowid
+                    WHERE questions_fts MATCH ? AND q.tool = ? AND q.difficulty = ?
+                    AND q.status = 'active' AND q.id NOT IN ({placeholders})
+                    ORDER BY bm25(questions_fts, ?, ?, ?) LIMIT ?""",
+                (expression, tool, difficulty, *exclude_ids, *SEARCH_WEIGHTS, limit)
+            ).fetchall()
+            ranked.append([
+                {
+                    "id": row["id"],
+                    "question": row["question"],
+                    "options": json.loads(row["options"]),
+                    "correct_answer": row["correct_answer"],
+                    "topics": json.loads(row["topics"]),
+                }
+                for row in rows
+            ])
+    return ranked
+
+def record_attempt(candidate_info, questions, answers, times, correct_answers, score, avg_time, notes_analysis,
+                   notes=None, notes_pending=False):
+    """Persist a finished interview and its per-question responses (idempotent per candidate)"""
+    with get_connection() as conn:
+        cursor = conn.execute(
+            """INSERT OR IGNORE INTO attempts
+               (candidate_id, name, role, tool, difficulty, started_at, score, avg_time,
+                cv_analysis, notes_analysis, notes, notes_pending)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (candidate_info["id"], candidate_info.get("name"), candidate_info.get("role"),
+             candidate_info.get("tool"), candidate_info.get("difficulty"), candidate_info.get("datetime"),
+             score, avg_time, json.dumps(candidate_info.get("cv_analysis")), json.dumps(notes_analysis),
+             json.dumps(notes), int(notes_pending))
+        )
+        # Streamlit reruns the results page on every interaction; only the first run records
+        if cursor.rowcount == 0:
+            return False
+
+        attempt_id = cursor.lastrowid
+        rows = [
+            (attempt_id, q["id"], i, a, c, t)
+            for i, (q, a, c, t) in enumerate(zip(questions, answers, correct_answers, times))
+            if "id" in q
+        ]
+        conn.executemany(
+            "INSERT INTO responses (attempt_id, question_id, position, answer, correct, time) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+    return True
+
+def pending_notes_analyses():
+    """Attempts whose notes analysis was deferred past the results page deadline"""
+    with get_connection() as conn:
+        return conn.execute(
+            "SELECT candidate_id, role, notes FROM attempts WHERE notes_pending = 1"
+        ).fetchall()
+
+def save_notes_analysis(candidate_id, notes_analysis):
+    """Fill in a deferred notes analysis"""
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE attempts SET notes_analysis = ?, notes_pending = 0 WHERE candidate_id = ? AND notes_pending = 1",
+            (json.dumps(notes_analysis), candidate_id)
+        )
+
+def fetch_responses():
+    """Return (question_id, attempt_id, correct, time) rows for every stored response"""
+    with get_connection() as conn:
+        return conn.execute(
+            "SELECT question_id, attempt_id, correct, time FROM responses ORDER BY attempt_id, position"
+        ).fetchall()
+
+def update_item_statistics(rows, retired_ids):
+    """Write calibrated item statistics back and retire the flagged questions"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_connection() as conn:
+        conn.executemany(
+            """UPDATE questions
+               SET n_responses = ?, p_value = ?, discrimination = ?, median_time = ?, calibrated_at = ?
+               WHERE id = ?""",
+            [(n, p, d, m, now, qid) for qid, n, p, d, m in rows]
+        )
+        conn.executemany(
+            "UPDATE questions SET status = 'retired' WHERE id = ?",
+            [(qid,) for qid in retired_ids]
+        )
@@ -0,0 +1,222 @@
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import tempfile
+import time
+import zlib
+import question_bank
+
+# Pack layout (little endian):
+#   header   MAGIC, version u16, reserved u16, dict_offset u64, dict_length u32,
+#            index_offset u64, index_length u32
+#   records  each question is a zlib stream compressed against the shared dictionary
+#   dict     zlib preset dictionary built from common question text
+#   locs     per key, contiguous (offset u64, length u32) entries pointing at records
+#   index    JSON {"tool\tdifficulty": [locs_offset, count]}
+# Opening a pack reads only the header, dictionary and key index; records are
+# decompressed one at a time straight from the memory map.
+MAGIC = b"AIQP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQIQI")
+LOCATION = struct.Struct("<QI")
+DICT_SIZE = 32 * 1024
+COMPRESSION_LEVEL = 9
+
+# Optional pack to serve questions from without calling the LLM (offline kiosks)
+PACK_PATH = os.environ.get("QUESTION_PACK_PATH")
+
+def _key(tool, difficulty):
+    return f"{tool}\t{difficulty}"
+
+def _encode(question):
+    return json.dumps(
+        [question["question"], question["options"], question["correct_answer"]],
+        separators=(",", ":")
+    ).encode()
+
+def _build_dictionary(encoded, size=DICT_SIZE):
+    """Preset dictionary from a sample of records; later bytes get the shortest back-references"""
+    sample = random.Random(0).sample(encoded, min(len(encoded), 2000))
+    return b"".join(sample)[-size:]
+
+def write_pack(path, grouped_questions):
+    """Write {(tool, difficulty): [question, ...]} to a pack file"""
+    encoded = {key: [_encode(q) for q in questions] for key, questions in grouped_questions.items()}
+    zdict = _build_dictionary([record for records in encoded.values() for record in records])
+
+    with open(path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        locations = {}
+        for key, records in encoded.items():
+            locs = []
+            for record in records:
+                compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=zdict)
+                blob = compressor.compress(record) + compressor.flush()
+                locs.append((f.tell(), len(blob)))
+                f.write(blob)
+            locations[key] = locs
+
+        dict_offset = f.tell()
+        f.write(zdict)
+
+        index = {}
+        for (tool, difficulty), locs in locations.items():
+            index[_key(tool, difficulty)] = [f.tell(), len(locs)]
+            f.write(b"".join(LOCATION.pack(offset, length) for offset, length in locs))
+
+        index_offset = f.tell()
+        index_blob = json.dumps(index).encode()
+        f.write(index_blob)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, dict_offset, len(zdict), index_offset, len(index_blob)))
+
+class QuestionPack:
+    """Read-only, memory-mapped view over a question pack"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, dict_offset, dict_length, index_offset, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} question pack")
+        self._zdict = self._map[dict_offset:dict_offset + dict_length]
+        self._index = json.loads(self._map[index_offset:index_offset + index_length])
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def keys(self):
+        return [tuple(key.split("\t")) for key in self._index]
+
+    def count(self, tool, difficulty):
+        entry = self._index.get(_key(tool, difficulty))
+        return entry[1] if entry else 0
+
+    def get(self, tool, difficulty, i):
+        """Decompress the i-th question stored under (tool, difficulty)"""
+        locs_offset, count = self._index[_key(tool, difficulty)]
+        if not 0 <= i < count:
+            raise IndexError(i)
+        offset, length = LOCATION.unpack_from(self._map, locs_offset + i * LOCATION.size)
+        decompressor = zlib.decompressobj(zdict=self._zdict)
+        question, options, correct_answer = json.loads(decompressor.decompress(self._map[offset:offset + length]))
+        return {"question": question, "options": options, "correct_answer": correct_answer}
+
+    def sample(self, tool, difficulty, n):
+        """Pick n distinct random questions for a key, decompressing only those"""
+        count = self.count(tool, difficulty)
+        return [self.get(tool, difficulty, i) for i in random.sample(range(count), min(n, count))]
+
+    def __iter__(self):
+        for tool, difficulty in self.keys():
+            for i in range(self.count(tool, difficulty)):
+                yield tool, difficulty, self.get(tool, difficulty, i)
+
+_pack = None
+
+def get_pack():
+    """The configured QUESTION_PACK_PATH pack, opened once per process"""
+    global _pack
+    if _pack is None and PACK_PATH:
+        _pack = QuestionPack(PACK_PATH)
+    return _pack
+
+def export_bank(path, include_retired=False):
+    """Export the question bank to a pack file"""
+    grouped = {}
+    with question_bank.get_connection() as conn:
+        query = "SELECT tool, difficulty, question, options, correct_answer FROM questions"
+        if not include_retired:
+            query += " WHERE status = 'active'"
+        for row in conn.execute(query):
+            grouped.setdefault((row["tool"], row["difficulty"]), []).append({
+                "question": row["question"],
+                "options": json.loads(row["options"]),
+                "correct_answer": row["correct_answer"],
+            })
+    write_pack(path, grouped)
+    return sum(len(questions) for questions in grouped.values())
+
+def import_pack(path):
+    """Load every question in a pack into the question bank"""
+    pack = QuestionPack(path)
+    grouped = {}
+    try:
+        for tool, difficulty, question in pack:
+            grouped.setdefault((tool, difficulty), []).append(question)
+    finally:
+        pack.close()
+    for (tool, difficulty), questions in grouped.items():
+        question_bank.add_questions(tool, difficulty, questions)
+    return sum(len(questions) for questions in grouped.values())
+
+def benchmark(count, keys=50):
+    """Compare pack open/access times against parsing the same bank as plain JSON"""
+    rng = random.Random(42)
+    words = ["closure", "goroutine", "hook", "lifecycle", "generic", "thread", "index", "query",
+             "module", "promise", "coroutine", "pointer", "decorator", "lambda", "container"]
+    grouped = {}
+    for i in range(count):
+        key = (f"Tool{i % keys}", ["Easy", "Medium", "Hard"][i % 3])
+        options = [" ".join(rng.choices(words, k=4)) for _ in range(4)]
+        grouped.setdefault(key, []).append({
+            "question": f"Which statement about {' '.join(rng.choices(words, k=6))} is correct? #{i}",
+            "options": options,
+            "correct_answer": options[rng.randrange(4)],
+        })
+
+    with tempfile.TemporaryDirectory(prefix="pack_bench_") as workdir:
+        pack_path = os.path.join(workdir, "bench.aiqp")
+        json_path = os.path.join(workdir, "bench.json")
+
+        started = time.perf_counter()
+        write_pack(pack_path, grouped)
+        write_time = time.perf_counter() - started
+        with open(json_path, "w") as f:
+            json.dump({_key(*key): questions for key, questions in grouped.items()}, f)
+
+        started = time.perf_counter()
+        pack = QuestionPack(pack_path)
+        open_time = time.perf_counter() - started
+
+        sample_keys = [rng.choice(list(grouped)) for _ in range(1000)]
+        started = time.perf_counter()
+        for tool, difficulty in sample_keys:
+            pack.sample(tool, difficulty, 10)
+        sample_time = (time.perf_counter() - started) / len(sample_keys)
+        pack.close()
+
+        started = time.perf_counter()
+        with open(json_path) as f:
+            json.load(f)
+        json_time = time.perf_counter() - started
+
+        print(f"Questions: {count}  Keys: {len(grouped)}")
+        print(f"Pack size: {os.path.getsize(pack_path) / 1e6:.1f} MB  JSON size: {os.path.getsize(json_path) / 1e6:.1f} MB")
+        print(f"Write: {write_time:.2f}s")
+        print(f"Open pack: {open_time * 1000:.2f} ms  Parse JSON: {json_time * 1000:.1f} ms")
+        print(f"Sample 10 questions: {sample_time * 1e6:.0f} us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Question pack export, import and benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Write the question bank to a pack")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--include-retired", action="store_true")
+    import_parser = subparsers.add_parser("import", help="Load a pack into the question bank")
+    import_parser.add_argument("path")
+    bench_parser = subparsers.add_parser("bench", help="Benchmark pack load and access times")
+    bench_parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        print(f"Exported {export_bank(args.path, args.include_retired)} questions to {args.path}")
+    elif args.command == "import":
+        print(f"Imported {import_pack(args.path)} questions from {args.path}")
+    else:
+        benchmark(args.count)
@@ -1,28 +1,349 @@
+import concurrent.futures
 import json
-from openai import OpenAI
 import os
+import re
+import threading
+import time
 import streamlit as st
+import question_bank
+import llm
+import schemas
+import ledger
+import question_pack
+import exposure
+import deadlines
+from deadlines import DeadlineExceeded
 
-# the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-# do not change this unless explicitly requested by the user
-openai = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# Remaining-question requests arriving within this window (seconds) share one LLM call,
+# up to this many questions in total; a window of 0 disables batching. Reply time grows
+# with the number of questions, so keep batches well within the page deadline.
+BATCH_WINDOW = float(os.environ.get("QUESTION_BATCH_WINDOW", 0.2))
+BATCH_MAX_QUESTIONS = int(os.environ.get("QUESTION_BATCH_MAX_QUESTIONS", 18))
+# Expected generation time per batched question until enough batches have been observed
+BATCH_SECONDS_PER_QUESTION = float(os.environ.get("QUESTION_BATCH_SECONDS_PER_QUESTION", 1.5))
+
+QUESTION_PROMPT = """Generate {count} multiple choice {noun} for a {difficulty} level {language} programming interview.
+    Each question should have exactly 4 distinct options with one correct answer.
+    The correct_answer must repeat the text of the correct option exactly.
+    Questions should test both theoretical knowledge and practical programming concepts.
+    Tag each question with 1-3 short lowercase topics (for example "asyncio", "gil", "decorators")."""
+
+BATCH_PROMPT = """Generate multiple choice questions for several programming interviews.
+    Return one section per request below, each with exactly the number of questions asked for.
+    Each question should have exactly 4 distinct options with one correct answer.
+    The correct_answer must repeat the text of the correct option exactly.
+    Questions should test both theoretical knowledge and practical programming concepts.
+    Tag each question with 1-3 short lowercase topics (for example "asyncio", "gil", "decorators").
+{sections}"""
+
+BATCH_SECTION = """    Section {number}: {count} {difficulty} level {language} questions"""
+
+TOPIC_PROMPT = """
+    Every question must be about one of these topics: {topics}."""
+
+def parse_topic_query(query):
+    """Split a recruiter query like "asyncio + GIL, decorators" into topics"""
+    return [topic.strip() for topic in re.split(r"[+,]", query) if topic.strip()]
+
+def request_questions(language, difficulty, count, priority, timeout, hedge=False, topics=None):
+    """Request `count` questions with strict schema output and validate them (raises on failure)"""
+    prompt = QUESTION_PROMPT.format(
+        count=count,
+        noun="question" if count == 1 else "questions",
+        difficulty=difficulty,
+        language=language
+    )
+    if topics:
+        prompt += TOPIC_PROMPT.format(topics=", ".join(topics))
+
+    validator = schemas.question_set_validator(count)
+
+    # Create the API request; a reply only counts once it validates
+    response_json = llm.structured_completion(
+        priority,
+        lambda response: schemas.parse_response(response, validator),
+        tool=language,
+        hedge=hedge,
+        messages=[
+            {"role": "system", "content": "You are an expert programming interviewer. Respond strictly in the requested JSON format."},
+            {"role": "user", "content": prompt}
+        ],
+        response_format=schemas.response_format("question_set", schemas.question_set_schema(count)),
+        timeout=timeout
+    )
+    return response_json["questions"]
+
+def request_question_batch(requests, on_call=None):
+    """Request question sets for several (language, difficulty, count) requests in one call
+
+    Returns each section's raw JSON unvalidated; callers validate sections one by one.
+    The call is handed to `on_call` instead of the ledger (see llm.chat_completion).
+    """
+    sections = "\n".join(
+        BATCH_SECTION.format(number=i + 1, count=count, difficulty=difficulty, language=language)
+        for i, (language, difficulty, count) in enumerate(requests)
+    )
+    response_json = llm.structured_completion(
+        llm.PRIORITY_REMAINING_QUESTIONS,
+        lambda response: json.loads(response.choices[0].message.content),
+        on_call=on_call,
+        messages=[
+            {"role": "system", "content": "You are an expert programming interviewer. Respond strictly in the requested JSON format."},
+            {"role": "user", "content": BATCH_PROMPT.format(sections=sections)}
+        ],
+        response_format=schemas.response_format(
+            "question_batch", schemas.question_batch_schema([count for _, _, count in requests])
+        ),
+        timeout=60
+    )
+    return [response_json.get(f"section_{i + 1}") for i in range(len(requests))]
+
+def _split_batch_calls(calls, counts):
+    """Split each batched call's tokens across requests by question count
+
+    Returns one list of ledger entries per request; the shares add up to the call's tokens.
+    """
+    total = sum(counts)
+    shares = [[] for _ in counts]
+    for call_site, model, response, latency, ok, _ in calls:
+        usage = getattr(response, "usage", None)
+        prompt = usage.prompt_tokens if usage else 0
+        completion = usage.completion_tokens if usage else 0
+        done = 0
+        for i, count in enumerate(counts):
+            before, done = done, done + count
+            shares[i].append({
+                "call_site": call_site,
+                "model": model,
+                "prompt_tokens": round(prompt * done / total) - round(prompt * before / total),
+                "completion_tokens": round(completion * done / total) - round(completion * before / total),
+                "latency": latency,
+                "ok": ok,
+            })
+    return shares
+
+def _record_batch_share(entries, language):
+    """Charge this request's share of a batched call to the caller's own session and tool"""
+    for entry in entries:
+        try:
+            ledger.record_call(tool=language, **entry)
+        except Exception:
+            pass
+
+class _Batch:
+    def __init__(self):
+        self.requests = []   # (language, difficulty, count)
+        self.futures = []
+        self.full = threading.Event()
+
+    @property
+    def questions(self):
+        return sum(count for _, _, count in self.requests)
+
+class QuestionBatcher:
+    """Micro-batches concurrent question requests for different keys into one LLM call
+
+    The first caller opens a batch, waits up to `window` seconds for others to join
+    (or until `max_questions` are asked for), then makes the call for everyone if its
+    deadline leaves time for a batch of that size. Each section is validated on its own;
+    a caller whose section is missing or invalid, or whose batch failed or wasn't sent,
+    retries with its own request. A batch that ran out of deadline raises
+    DeadlineExceeded for every caller, so they go straight to their stored-question
+    fallback. Every caller records its share of the batched call in the ledger under its
+    own session and tool.
+    """
+
+    def __init__(self, window=BATCH_WINDOW, max_questions=BATCH_MAX_QUESTIONS):
+        self.window = window
+        self.max_questions = max_questions
+        self._lock = threading.Lock()
+        self._open = None
+        self._batches = 0
+        self._batched_requests = 0
+        # Seconds per question of successful batched calls
+        self._latency = llm.LatencyTracker()
+
+    def request(self, language, difficulty, count):
+        """Questions for one key, possibly generated together with other keys (raises on failure)"""
+        if self.window <= 0 or count >= self.max_questions:
+            return request_questions(language, difficulty, count, llm.PRIORITY_REMAINING_QUESTIONS, timeout=60)
+
+        future = concurrent.futures.Future()
+        with self._lock:
+            batch = self._open
+            if batch is not None and batch.questions + count > self.max_questions:
+                # No room left: send that batch now and open a new one
+                batch.full.set()
+                batch = None
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            batch.requests.append((language, difficulty, count))
+            batch.futures.append(future)
+            if batch.questions >= self.max_questions:
+                self._open = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            self._run(batch)
+
+        try:
+            questions, ledger_entries, error = future.result(timeout=deadlines.remaining())
+        except concurrent.futures.TimeoutError:
+            raise DeadlineExceeded("Deadline reached while waiting for a batched question request")
+        _record_batch_share(ledger_entries, language)
+        if error is not None:
+            raise error
+        if questions is None:
+            return request_questions(language, difficulty, count, llm.PRIORITY_REMAINING_QUESTIONS, timeout=60)
+        return questions
+
+    def expected_latency(self, questions):
+        """Likely seconds to generate a batch of this many questions (observed p90)"""
+        per_question = self._latency.percentile("batch", 90) or BATCH_SECONDS_PER_QUESTION
+        return questions * per_question
+
+    def _run(self, batch):
+        requests = batch.requests
+        with self._lock:
+            self._batches += 1
+            self._batched_requests += len(requests)
+        left = deadlines.remaining()
+        if len(requests) == 1 or (left is not None and left < self.expected_latency(batch.questions)):
+            # Nobody joined, or the leader's deadline can't fit the batch: everyone asks alone,
+            # in their own context and against their own deadline
+            for future in batch.futures:
+                future.set_result((None, [], None))
+            return
+        # The leader's context belongs to one session; each caller records its own share
+        calls = []
+        error = None
+        started = time.perf_counter()
+        try:
+            sections = request_question_batch(requests, on_call=lambda *call: calls.append(call))
+            self._latency.observe("batch", (time.perf_counter() - started) / batch.questions)
+        except DeadlineExceeded as e:
+            # A retry per caller would start with no time left
+            sections, error = [None] * len(requests), e
+        except Exception:
+            sections = [None] * len(requests)
+        shares = _split_batch_calls(calls, [count for _, _, count in requests])
+        for (_, _, count), section, share, future in zip(requests, sections, shares, batch.futures):
+            try:
+                schemas.question_set_validator(count)(section)
+            except (ValueError, KeyError, TypeError):
+                future.set_result((None, share, error))
+            else:
+                future.set_result((section["questions"], share, None))
+
+    def get_metrics(self):
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "requests": self._batched_requests,
+                "mean_batch_size": self._batched_requests / self._batches if self._batches else 0.0,
+            }
+
+batcher = QuestionBatcher()
+
+def request_first_question(language, difficulty):
+    """Request and validate the first question (raises on failure)"""
+    return request_questions(language, difficulty, 1, llm.PRIORITY_FIRST_QUESTION, timeout=30, hedge=True)
+
+def request_remaining_questions(language, difficulty):
+    """Request and validate the remaining 9 questions, batched with other keys (raises on failure)"""
+    return batcher.request(language, difficulty, 9)
+
+def questions_from_pack(language, difficulty):
+    """Serve a 10-question set from the configured question pack (offline nodes)"""
+    pack = question_pack.get_pack()
+    if pack is None or pack.count(language, difficulty) < 10:
+        return None
+    # Bank ids let the attempt feed item calibration like generated questions do, and carry serve counts
+    questions = exposure.sample_pack(pack, language, difficulty, 10)
+    if len(questions) < 10:
+        return None
+    ledger.record_call("question_pack", None, cache_hit=True, tool=language)
+    return questions
+
+def questions_from_bank(language, difficulty):
+    """Serve a stored 10-question set instead of calling the LLM once the token budget is spent"""
+    if not ledger.over_budget():
+        return None
+    questions = exposure.sample_questions(language, difficulty, 10)
+    if len(questions) < 10:
+        return None
+    ledger.record_call("question_bank", None, cache_hit=True, tool=language)
+    return questions
+
+def complete_from_cache(language, difficulty, questions, count=10):
+    """Top a partial set up to `count` with stored questions when generation misses its deadline"""
+    if questions:
+        question_bank.add_questions(language, difficulty, questions)
+    needed = count - len(questions)
+    filler = exposure.sample_questions(language, difficulty, needed, exclude_ids=[q["id"] for q in questions])
+    pack = question_pack.get_pack()
+    if len(filler) < needed and pack is not None:
+        seen = {q["question"] for q in questions + filler}
+        filler += exposure.sample_pack(pack, language, difficulty, needed - len(filler), exclude_questions=seen)
+    if len(filler) < needed:
+        return None
+    ledger.record_call("question_bank", None, cache_hit=True, tool=language)
+    return questions + filler
+
+def build_question_set(language, difficulty):
+    """Generate and store a full 10-question set without any UI (raises on failure)"""
+    cached = questions_from_pack(language, difficulty) or questions_from_bank(language, difficulty)
+    if cached:
+        return cached
+
+    all_questions = []
+    try:
+        all_questions += request_first_question(language, difficulty)
+        all_questions += request_remaining_questions(language, difficulty)
+    except DeadlineExceeded:
+        fallback = complete_from_cache(language, difficulty, all_questions)
+        if fallback is None:
+            raise
+        return fallback
+
+    if len(all_questions) != 10:
+        raise ValueError(f"Expected 10 questions, got {len(all_questions)}")
+    question_bank.add_questions(language, difficulty, all_questions)
+    return all_questions
+
+def assemble_test(query, language, difficulty, n=10):
+    """Assemble an n-question set on the topics in `query` from the question bank
+
+    Only the shortfall, if any, is generated by the LLM (raises on failure).
+    """
+    topics = parse_topic_query(query)
+    if not topics:
+        raise ValueError("Topic query is empty")
+
+    questions = exposure.search_questions(language, difficulty, topics, n)
+    if questions:
+        ledger.record_call("topic_index", None, cache_hit=True, tool=language)
+    if len(questions) == n:
+        return questions
+
+    try:
+        generated = request_questions(language, difficulty, n - len(questions),
+                                      llm.PRIORITY_REMAINING_QUESTIONS, timeout=60, topics=topics)
+    except DeadlineExceeded:
+        # Off-topic stored questions beat no test at all
+        fallback = complete_from_cache(language, difficulty, questions, count=n)
+        if fallback is None:
+            raise
+        return fallback
+    return questions + question_bank.add_questions(language, difficulty, generated)
 
 def generate_first_question(language, difficulty):
     """Generate just the first question quickly"""
-    prompt = f"""Generate 1 multiple choice question for a {difficulty} level {language} programming interview.
-    The question should have 4 options with one correct answer.
-    Format the response as a JSON object with a 'questions' array where each question object has:
-    {{
-        "questions": [
-            {{
-                "question": "question text",
-                "options": ["option1", "option2", "option3", "option4"],
-                "correct_answer": "correct option text"
-            }}
-        ]
-    }}
-    Question should test both theoretical knowledge and practical programming concepts."""
-
     try:
         # Initialize progress tracking
         progress_bar = st.progress(0)
@@ -34,59 +355,21 @@ def generate_first_question(language, difficulty):
 
         progress_bar.progress(20)
 
-        # Create the API request
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an expert programming interviewer. Respond strictly in the requested JSON format."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            timeout=30
-        )
-
-        progress_bar.progress(60)
-        st.write("✨ Processing response...")
-
-        # Parse and validate response
-        try:
-            response_content = response.choices[0].message.content
-            response_json = json.loads(response_content)
-
-            # Validate JSON structure
-            if not isinstance(response_json, dict):
-                raise ValueError("Response is not a JSON object")
-            if "questions" not in response_json:
-                raise ValueError("Response missing 'questions' array")
-            if not isinstance(response_json["questions"], list):
-                raise ValueError("'questions' is not an array")
-
-            question = response_json["questions"][0]
-
-            # Validate question structure
-            if not all(key in question for key in ["question", "options", "correct_answer"]):
-                raise ValueError("Question missing required fields")
-            if not isinstance(question["options"], list):
-                raise ValueError("Question options is not an array")
-            if len(question["options"]) != 4:
-                raise ValueError("Question does not have exactly 4 options")
-            if question["correct_answer"] not in question["options"]:
-                raise ValueError("Question correct answer not in options")
-
-            progress_bar.progress(100)
-            st.write("✅ First question ready!")
-            return [question]
-
-        except json.JSONDecodeError as e:
-            st.error(f"Invalid JSON format in API response: {str(e)}")
-            return None
-        except ValueError as e:
-            st.error(f"Invalid response format: {str(e)}")
-            return None
-        except Exception as e:
-            st.error(f"Error processing response: {str(e)}")
-            return None
+        question = request_first_question(language, difficulty)
+
+        progress_bar.progress(100)
+        st.write("✅ First question ready!")
+        return question
 
+    except DeadlineExceeded:
+        # Handled by generate_questions with stored questions
+        raise
+    except json.JSONDecodeError as e:
+        st.error(f"Invalid JSON format in API response: {str(e)}")
+        return None
+    except ValueError as e:
+        st.error(f"Invalid response format: {str(e)}")
+        return None
     except Exception as e:
         st.error(f"Failed to generate question: {str(e)}")
         st.warning("Please try again. If the problem persists, contact support.")
@@ -94,87 +377,66 @@ def generate_first_question(language, difficulty):
 
 def generate_remaining_questions(language, difficulty, first_question):
     """Generate the remaining 9 questions"""
-    prompt = f"""Generate 9 more multiple choice questions for a {difficulty} level {language} programming interview.
-    Each question should have 4 options with one correct answer.
-    Format the response as a JSON object with a 'questions' array where each question object has:
-    {{
-        "questions": [
-            {{
-                "question": "question text",
-                "options": ["option1", "option2", "option3", "option4"],
-                "correct_answer": "correct option text"
-            }}
-        ]
-    }}
-    Questions should test both theoretical knowledge and practical programming concepts."""
-
     try:
-        # Create the API request
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an expert programming interviewer. Respond strictly in the requested JSON format."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            timeout=60
-        )
-
-        # Parse and validate response
-        try:
-            response_content = response.choices[0].message.content
-            response_json = json.loads(response_content)
-
-            # Validate JSON structure
-            if not isinstance(response_json, dict):
-                raise ValueError("Response is not a JSON object")
-            if "questions" not in response_json:
-                raise ValueError("Response missing 'questions' array")
-            if not isinstance(response_json["questions"], list):
-                raise ValueError("'questions' is not an array")
-
-            questions = response_json["questions"]
-
-            # Validate each question
-            for i, question in enumerate(questions):
-                if not all(key in question for key in ["question", "options", "correct_answer"]):
-                    raise ValueError(f"Question {i+1} missing required fields")
-                if not isinstance(question["options"], list):
-                    raise ValueError(f"Question {i+1} options is not an array")
-                if len(question["options"]) != 4:
-                    raise ValueError(f"Question {i+1} does not have exactly 4 options")
-                if question["correct_answer"] not in question["options"]:
-                    raise ValueError(f"Question {i+1} correct answer not in options")
-
-            # Combine with first question
-            all_questions = first_question + questions
-            return all_questions
+        questions = request_remaining_questions(language, difficulty)
 
-        except json.JSONDecodeError as e:
-            st.error(f"Invalid JSON format in API response: {str(e)}")
-            return None
-        except ValueError as e:
-            st.error(f"Invalid response format: {str(e)}")
-            return None
-        except Exception as e:
-            st.error(f"Error processing response: {str(e)}")
-            return None
+        # Combine with first question
+        all_questions = first_question + questions
+        return all_questions
 
+    except DeadlineExceeded:
+        raise
+    except json.JSONDecodeError as e:
+        st.error(f"Invalid JSON format in API response: {str(e)}")
+        return None
+    except ValueError as e:
+        st.error(f"Invalid response format: {str(e)}")
+        return None
     except Exception as e:
         st.error(f"Failed to generate remaining questions: {str(e)}")
         st.warning("Please try again. If the problem persists, contact support.")
         return None
 
+def cached_fallback(language, difficulty, questions):
+    """Finish the set from stored questions instead of keeping the candidate waiting"""
+    try:
+        all_questions = complete_from_cache(language, difficulty, questions)
+    except Exception as e:
+        st.warning(f"Could not read stored questions: {str(e)}")
+        all_questions = None
+    if all_questions is None:
+        st.error("Question generation is taking longer than expected. Please try again.")
+        return None
+    st.info("⏱️ Question generation was slow, so stored questions were used to keep the interview on time.")
+    return all_questions
+
 def generate_questions(language, difficulty):
     """Main function to generate all questions"""
+    try:
+        cached = questions_from_pack(language, difficulty) or questions_from_bank(language, difficulty)
+        if cached:
+            return cached
+    except Exception as e:
+        st.warning(f"Could not read stored questions: {str(e)}")
+
     # First generate the initial question quickly
-    first_question = generate_first_question(language, difficulty)
+    try:
+        first_question = generate_first_question(language, difficulty)
+    except DeadlineExceeded:
+        return cached_fallback(language, difficulty, [])
     if not first_question:
         return None
 
     # Then generate the remaining questions
     with st.spinner("Generating remaining questions..."):
-        all_questions = generate_remaining_questions(language, difficulty, first_question)
+        try:
+            all_questions = generate_remaining_questions(language, difficulty, first_question)
+        except DeadlineExceeded:
+            return cached_fallback(language, difficulty, first_question)
         if all_questions and len(all_questions) == 10:
+            try:
+                question_bank.add_questions(language, difficulty, all_questions)
+            except Exception as e:
+                st.warning(f"Could not save questions to the bank: {str(e)}")
             return all_questions
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,64 @@
+import os
+import threading
+from collections import deque
+from streamlit.logger import get_logger
+
+# Server time spent rendering each interview question, kept in memory so the question loop
+# does no I/O for it. Separate from the LLM ledger, whose report covers provider calls only.
+WINDOW = 1000
+# Report p50/p90 to the server log and any reporters every this many renders (0 disables)
+LOG_EVERY = int(os.environ.get("RENDER_METRICS_LOG_EVERY", 500))
+
+logger = get_logger(__name__)
+
+class RenderTimes:
+    """Rolling window of question render times for this process"""
+
+    def __init__(self, size=WINDOW):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=size)
+        self._renders = 0
+        self._reporters = []
+
+    def add_reporter(self, callback):
+        """Call `callback(summary)` every LOG_EVERY renders, e.g. to push it to a metrics backend"""
+        with self._lock:
+            self._reporters.append(callback)
+
+    def observe(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self._renders += 1
+            report = LOG_EVERY and self._renders % LOG_EVERY == 0
+        if report:
+            self.report()
+
+    def report(self):
+        """Log the current summary and hand it to every reporter"""
+        summary = self.summary()
+        if summary["window"]:
+            logger.info(f"Question render over the last {summary['window']}: p50 {summary['p50_ms']:.1f} ms, "
+                        f"p90 {summary['p90_ms']:.1f} ms, max {summary['max_ms']:.1f} ms")
+        with self._lock:
+            reporters = list(self._reporters)
+        for callback in reporters:
+            try:
+                callback(summary)
+            except Exception:
+                logger.exception("Render metrics reporter failed")
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            renders = self._renders
+        if not samples:
+            return {"renders": renders, "window": 0, "p50_ms": None, "p90_ms": None, "max_ms": None}
+        return {
+            "renders": renders,
+            "window": len(samples),
+            "p50_ms": 1000 * samples[len(samples) // 2],
+            "p90_ms": 1000 * samples[min(len(samples) - 1, int(len(samples) * 0.9))],
+            "max_ms": 1000 * samples[-1],
+        }
+
+render_times = RenderTimes()
@@ -0,0 +1,173 @@
+import json
+from roles import TECH_ROLES
+
+# JSON schemas for every structured LLM response. They are sent to the API in strict
+# mode, so every property is required and no extra properties are allowed.
+
+def _strict_object(properties):
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+def _string_list(min_items=None, max_items=None):
+    schema = {"type": "array", "items": {"type": "string"}}
+    if min_items is not None:
+        schema["minItems"] = min_items
+    if max_items is not None:
+        schema["maxItems"] = max_items
+    return schema
+
+QUESTION_SCHEMA = _strict_object({
+    "question": {"type": "string"},
+    "options": _string_list(4, 4),
+    "correct_answer": {"type": "string"},
+    "topics": _string_list(1, 3),
+})
+
+def question_set_schema(count):
+    """Schema for a {'questions': [...]} reply with exactly `count` questions"""
+    return _strict_object({
+        "questions": {"type": "array", "items": QUESTION_SCHEMA, "minItems": count, "maxItems": count},
+    })
+
+def question_batch_schema(counts):
+    """Schema for a batched reply with one question set per section ('section_1', ...)"""
+    return _strict_object({
+        f"section_{i + 1}": question_set_schema(count) for i, count in enumerate(counts)
+    })
+
+CV_ANALYSIS_SCHEMA = _strict_object({
+    "candidate_name": {"type": "string"},
+    "suggested_role": {"type": "string", "enum": list(TECH_ROLES)},
+    "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+    "reasoning": {"type": "string"},
+    "education": {"type": "string"},
+    "key_skills": _string_list(),
+    "recommended_languages": _string_list(),
+    "years_of_experience": {"type": "string"},
+})
+
+NOTES_ANALYSIS_SCHEMA = _strict_object({
+    "key_observations": _string_list(),
+    "strengths": _string_list(),
+    "areas_of_improvement": _string_list(),
+    "role_fit": {"type": "number", "minimum": 0, "maximum": 100},
+    "recommendations": _string_list(),
+})
+
+def response_format(name, schema):
+    """OpenAI response_format requesting strict JSON-schema output"""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": schema},
+    }
+
+def compile_validator(schema, path="$"):
+    """Compile a schema into a single validation closure (raises ValueError on mismatch)
+
+    Covers the subset of JSON Schema used above: object, array, string, number,
+    integer, boolean, enum, required, additionalProperties, min/maxItems, minimum/maximum.
+    """
+    kind = schema["type"]
+    checks = []
+
+    if kind == "object":
+        properties = {
+            key: compile_validator(sub, f"{path}.{key}")
+            for key, sub in schema.get("properties", {}).items()
+        }
+        required = schema.get("required", [])
+        closed = schema.get("additionalProperties", True) is False
+
+        def check_object(value):
+            if not isinstance(value, dict):
+                raise ValueError(f"{path} is not an object")
+            for key in required:
+                if key not in value:
+                    raise ValueError(f"{path} missing required field '{key}'")
+            for key, item in value.items():
+                if key in properties:
+                    properties[key](item)
+                elif closed:
+                    raise ValueError(f"{path} has unexpected field '{key}'")
+        return check_object
+
+    if kind == "array":
+        item_validator = compile_validator(schema["items"], f"{path}[]") if "items" in schema else None
+        min_items = schema.get("minItems")
+        max_items = schema.get("maxItems")
+
+        def check_array(value):
+            if not isinstance(value, list):
+                raise ValueError(f"{path} is not an array")
+            if min_items is not None and len(value) < min_items:
+                raise ValueError(f"{path} has {len(value)} items, expected at least {min_items}")
+            if max_items is not None and len(value) > max_items:
+                raise ValueError(f"{path} has {len(value)} items, expected at most {max_items}")
+            if item_validator is not None:
+                for item in value:
+                    item_validator(item)
+        return check_array
+
+    if kind == "string":
+        checks.append(lambda value: isinstance(value, str) or _fail(f"{path} is not a string"))
+    elif kind == "integer":
+        checks.append(lambda value: (isinstance(value, int) and not isinstance(value, bool))
+                      or _fail(f"{path} is not an integer"))
+    elif kind == "number":
+        checks.append(lambda value: (isinstance(value, (int, float)) and not isinstance(value, bool))
+                      or _fail(f"{path} is not a number"))
+    elif kind == "boolean":
+        checks.append(lambda value: isinstance(value, bool) or _fail(f"{path} is not a boolean"))
+    else:
+        raise ValueError(f"Unsupported schema type: {kind}")
+
+    if "enum" in schema:
+        allowed = frozenset(schema["enum"])
+        checks.append(lambda value: value in allowed or _fail(f"{path} must be one of the allowed values, got {value!r}"))
+    if "minimum" in schema:
+        low = schema["minimum"]
+        checks.append(lambda value: value >= low or _fail(f"{path} is below {low}"))
+    if "maximum" in schema:
+        high = schema["maximum"]
+        checks.append(lambda value: value <= high or _fail(f"{path} is above {high}"))
+
+    def check_scalar(value):
+        for check in checks:
+            check(value)
+    return check_scalar
+
+def _fail(message):
+    raise ValueError(message)
+
+def _check_answer_keys(response_json):
+    for i, question in enumerate(response_json["questions"]):
+        if question["correct_answer"] not in question["options"]:
+            raise ValueError(f"Question {i+1} correct answer not in options")
+        if len(set(question["options"])) != 4:
+            raise ValueError(f"Question {i+1} has duplicate options")
+
+_question_set_validators = {}
+
+def question_set_validator(count):
+    """Compiled validator for a question set, including answer-key checks"""
+    if count not in _question_set_validators:
+        structural = compile_validator(question_set_schema(count))
+
+        def validate(response_json):
+            structural(response_json)
+            _check_answer_keys(response_json)
+        _question_set_validators[count] = validate
+    return _question_set_validators[count]
+
+validate_cv_analysis = compile_validator(CV_ANALYSIS_SCHEMA)
+validate_notes_analysis = compile_validator(NOTES_ANALYSIS_SCHEMA)
+
+def parse_response(response, validator):
+    """Decode a chat completion's JSON content and validate it in one pass"""
+    response_json = json.loads(response.choices[0].message.content)
+    validator(response_json)
+    return response_json
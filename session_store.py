@@ -0,0 +1,131 @@
+import abc
+import json
+import os
+import sqlite3
+from datetime import datetime
+import question_bank
+
+# Session fields that survive a restart or a hop to another process/node
+PERSISTED_KEYS = [
+    'current_question',
+    'questions',
+    'answers',
+    'times',
+    'notes',
+    'start_time',
+    'shown_question',
+    'quiz_completed',
+    'candidate_id',
+    'profile_completed',
+    'candidate_info',
+    'cv_uploaded',
+    'verification_shown',
+    'suggested_role',
+    'page',
+    # Set during CV analysis
+    'candidate_name',
+    'recommended_languages',
+    'cv_analysis',
+    'suggested_difficulty',
+]
+
+# Abandoned sessions expire after a day
+SESSION_TTL = int(os.environ.get("SESSION_TTL", 24 * 60 * 60))
+
+class SessionStore(abc.ABC):
+    """Interface for session backends keyed by candidate ID"""
+
+    @abc.abstractmethod
+    def load(self, candidate_id):
+        """Serialized state for a candidate, or None if missing or expired"""
+
+    @abc.abstractmethod
+    def save(self, candidate_id, payload):
+        """Store serialized state for a candidate"""
+
+    @abc.abstractmethod
+    def delete(self, candidate_id):
+        """Forget a candidate's state"""
+
+class SQLiteSessionStore(SessionStore):
+    """Session backend for processes sharing a local disk"""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS sessions (
+                       candidate_id TEXT PRIMARY KEY,
+                       state TEXT NOT NULL,
+                       updated_at REAL NOT NULL
+                   )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def load(self, candidate_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state, updated_at FROM sessions WHERE candidate_id = ?",
+                (candidate_id,)
+            ).fetchone()
+        if row is None or datetime.now().timestamp() - row[1] > SESSION_TTL:
+            return None
+        return row[0]
+
+    def save(self, candidate_id, payload):
+        now = datetime.now().timestamp()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (candidate_id, state, updated_at) VALUES (?, ?, ?)",
+                (candidate_id, payload, now)
+            )
+            # Expired rows are never loaded again; drop them so abandoned sessions don't pile up
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - SESSION_TTL,))
+
+    def delete(self, candidate_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE candidate_id = ?", (candidate_id,))
+
+class RedisSessionStore(SessionStore):
+    """Session backend for multi-node deployments (any Redis-compatible server)"""
+
+    def __init__(self, url):
+        import redis  # optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url)
+
+    def _key(self, candidate_id):
+        return f"interview:session:{candidate_id}"
+
+    def load(self, candidate_id):
+        payload = self.client.get(self._key(candidate_id))
+        return payload.decode() if payload is not None else None
+
+    def save(self, candidate_id, payload):
+        self.client.set(self._key(candidate_id), payload, ex=SESSION_TTL)
+
+    def delete(self, candidate_id):
+        self.client.delete(self._key(candidate_id))
+
+_store = None
+
+def get_session_store():
+    """Return the configured backend (SESSION_BACKEND=sqlite|redis)"""
+    global _store
+    if _store is None:
+        backend = os.environ.get("SESSION_BACKEND", "sqlite")
+        if backend == "redis":
+            _store = RedisSessionStore(os.environ.get("SESSION_REDIS_URL", "redis://localhost:6379/0"))
+        else:
+            _store = SQLiteSessionStore(os.environ.get("SESSION_DB_PATH", question_bank.DB_PATH))
+    return _store
+
+def serialize_state(state):
+    """Serialize the persisted subset of a session state mapping"""
+    return json.dumps({key: state[key] for key in PERSISTED_KEYS if key in state}, sort_keys=True)
+
+def deserialize_state(payload):
+    return json.loads(payload)
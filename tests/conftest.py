@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Every test module shares a scratch bank and the mock LLM backend; set before the app modules import
+_scratch = tempfile.mkdtemp(prefix="interview_tests_")
+os.environ["QUESTION_BANK_PATH"] = os.path.join(_scratch, "interview_data.db")
+os.environ["SESSION_DB_PATH"] = os.path.join(_scratch, "sessions.db")
+os.environ["LLM_BACKEND"] = "mock"
+os.environ.setdefault("OPENAI_API_KEY", "mock")
@@ -0,0 +1,32 @@
+import asyncio
+import httpx
+import api
+
+def _post(path, payload, headers=None):
+    async def request():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=payload, headers=headers)
+    return asyncio.run(request())
+
+def test_notes_deadline_returns_gateway_timeout():
+    response = _post("/notes/analyze", {"notes": ["Explained the GIL clearly"], "role": "Backend Developer"},
+                     headers={"X-Deadline-Ms": "1"})
+    assert response.status_code == 504
+
+def test_questions_deadline_without_stored_questions_returns_gateway_timeout():
+    response = _post("/questions", {"tool": "Brainfuck", "difficulty": "Hard"}, headers={"X-Deadline-Ms": "1"})
+    assert response.status_code == 504
+
+def test_cv_deadline_falls_back_to_keywords():
+    response = _post("/cv/analyze", {"cv_text": "Jane Doe\nReact and CSS frontend developer"},
+                     headers={"X-Deadline-Ms": "1"})
+    assert response.status_code == 200
+    assert response.json()["analysis_source"] == "keywords"
+
+def test_cv_analysis_contract():
+    response = _post("/cv/analyze", {"cv_text": "Jane Doe\nBackend developer, 6 years of Python and Django APIs"})
+    assert response.status_code == 200
+    analysis = response.json()
+    assert set(analysis) == set(api.AnalyzeCVResponse.model_fields)
+    assert analysis["analysis_source"] == "llm"
@@ -0,0 +1,25 @@
+from cv_analysis import suggest_role_by_keywords
+
+FRONTEND_CV = """Jane Doe
+Frontend developer, 5 years building and maintaining React, Vue, HTML and CSS apps.
+Trained juniors, wrote a component style guide, and kept email templates in sync with design details.
+Worked for a capital markets startup.
+"""
+
+def test_keywords_match_whole_words_only():
+    analysis = suggest_role_by_keywords(FRONTEND_CV)
+    # "ai" in maintaining/trained/email/details, "ui" in building/guide and "api" in capital don't count
+    assert analysis["suggested_role"] == "Frontend Developer"
+    assert "ui" not in analysis["key_skills"]
+    assert analysis["years_of_experience"] == "5 years"
+
+def test_keywords_with_punctuation_still_match():
+    analysis = suggest_role_by_keywords("John Roe\nDevOps engineer: CI/CD pipelines, Docker, Kubernetes on AWS.")
+    assert analysis["suggested_role"] == "DevOps Engineer"
+    assert "ci/cd" in analysis["key_skills"]
+
+def test_languages_match_whole_words_only():
+    analysis = suggest_role_by_keywords("Sam Poe\nBackend developer with a good record on API and database work in Python.")
+    assert analysis["suggested_role"] == "Backend Developer"
+    # "go" appears only inside "good"
+    assert analysis["recommended_languages"] == ["Python"]
@@ -0,0 +1,48 @@
+import asyncio
+import json
+import httpx
+import pytest
+import question_bank
+import api
+
+@pytest.fixture(scope="module")
+def attempts():
+    questions = [{"question": f"Export question {i}", "options": ["A", "B"], "correct_answer": "A"} for i in range(3)]
+    question_bank.add_questions("Python", "Medium", questions)
+    ids = []
+    for n in range(1200):
+        candidate = {"id": f"EXPORT{n:04d}", "name": f"Candidate {n}", "role": "Backend Developer",
+                     "tool": "Python", "difficulty": "Medium", "datetime": "2026-01-01 10:00:00"}
+        question_bank.record_attempt(candidate, questions, ["A", "B", "A"], [1.0, 2.0, 3.0], [1, 0, 1],
+                                     66.7, 2.0, None)
+        ids.append(candidate["id"])
+    return ids
+
+def test_concurrent_streamed_exports(attempts):
+    async def export_all():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.get("/export", params={"format": fmt, "tool": "Python"})
+                for fmt in ("jsonl", "csv", "jsonl", "csv", "jsonl", "jsonl")
+            ])
+
+    for response in asyncio.run(export_all()):
+        assert response.status_code == 200
+        if response.headers["content-type"].startswith("application/x-ndjson"):
+            records = [json.loads(line) for line in response.text.splitlines()]
+            exported = [record["candidate_id"] for record in records]
+            assert all(len(record["answers"]) == 3 for record in records)
+        else:
+            lines = response.text.splitlines()
+            assert lines[0].startswith("candidate_id,")
+            exported = [line.split(",", 1)[0] for line in lines[1:]]
+        assert [cid for cid in exported if cid.startswith("EXPORT")] == attempts
+
+def test_export_rejects_parquet():
+    async def request():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/export", params={"format": "parquet"})
+
+    assert asyncio.run(request()).status_code == 400
@@ -0,0 +1,75 @@
+import collections
+import threading
+import time
+import exposure
+import question_bank
+
+def _store(tool, count, topic):
+    questions = [
+        {"question": f"{topic} question {i}", "options": ["A", "B"], "correct_answer": "A", "topics": [topic]}
+        for i in range(count)
+    ]
+    return question_bank.add_questions(tool, "Medium", questions)
+
+def _serve_counts(ids):
+    return {row["id"]: row["serve_count"] for row in question_bank.exposure_state(ids)}
+
+def test_topic_search_rotates_and_counts_serves():
+    stored = _store("SearchTool", 50, "asyncio")
+    seen = collections.Counter()
+    for _ in range(20):
+        questions = exposure.search_questions("SearchTool", "Medium", ["asyncio"], 5)
+        assert len(questions) == 5
+        seen.update(q["id"] for q in questions)
+    # Not the same top-5 bm25 matches every time
+    assert len(seen) > 5
+    counts = _serve_counts([q["id"] for q in stored])
+    assert sum(counts.values()) == 100
+    assert counts == {qid: seen[qid] for qid in counts}
+
+def test_topic_search_skips_and_queues_overexposed():
+    stored = _store("OverexposedTool", 6, "GIL")
+    with question_bank.get_connection() as conn:
+        conn.execute("UPDATE questions SET serve_count = ? WHERE id = ?", (exposure.MAX_SERVES, stored[0]["id"]))
+    questions = exposure.search_questions("OverexposedTool", "Medium", ["GIL"], 6)
+    assert stored[0]["id"] not in {q["id"] for q in questions}
+    queued = {row["question_id"] for row in question_bank.pending_regenerations(1000)}
+    assert stored[0]["id"] in queued
+
+class _Pack:
+    def __init__(self, questions):
+        self.questions = questions
+
+    def sample(self, tool, difficulty, n):
+        return [dict(q) for q in self.questions[:n]]
+
+def test_pack_draws_are_counted():
+    pack = _Pack([{"question": f"Pack question {i}", "options": ["A", "B"], "correct_answer": "A"} for i in range(30)])
+    questions = exposure.sample_pack(pack, "PackTool", "Medium", 10)
+    assert len(questions) == 10
+    assert set(_serve_counts([q["id"] for q in questions]).values()) == {1}
+
+def test_expired_index_serves_while_reloading(monkeypatch):
+    _store("ReloadTool", 20, "generators")
+    sampler = exposure.ExposureSampler(ttl=0)
+    assert len(sampler.sample("ReloadTool", "Medium", 5)) == 5
+
+    release = threading.Event()
+    load = sampler._load
+    def slow_load(tool, difficulty):
+        release.wait(5)
+        return load(tool, difficulty)
+    monkeypatch.setattr(sampler, "_load", slow_load)
+
+    # The reload is held up, yet draws keep being served from the expired index
+    started = time.monotonic()
+    assert len(sampler.sample("ReloadTool", "Medium", 5)) == 5
+    assert len(sampler.sample("ReloadTool", "Medium", 5)) == 5
+    assert time.monotonic() - started < 1
+    stale = sampler._indexes[("ReloadTool", "Medium")]
+    release.set()
+    for _ in range(100):
+        if sampler._indexes[("ReloadTool", "Medium")] is not stale:
+            break
+        time.sleep(0.01)
+    assert sampler._indexes[("ReloadTool", "Medium")] is not stale
@@ -0,0 +1,59 @@
+import threading
+import ledger
+import llm
+import mock_llm
+
+MESSAGES = [{"role": "user", "content": "Generate 1 multiple choice question for a Medium level Python programming interview."}]
+
+def _setup(monkeypatch, provider_latency):
+    scheduler = llm.LLMScheduler(max_concurrency=1)
+    budget = llm.HedgeBudget(ratio=1, burst=5)
+    monkeypatch.setattr(llm, "scheduler", scheduler)
+    monkeypatch.setattr(llm, "hedge_budget", budget)
+    monkeypatch.setattr(llm, "hedge_delay", lambda call_site: 0.05)
+    monkeypatch.setattr(mock_llm, "MOCK_LLM_LATENCY", provider_latency)
+    monkeypatch.setattr(mock_llm, "MOCK_LLM_JITTER", 0.0)
+    return scheduler, budget
+
+def test_no_hedge_while_primary_is_queued(monkeypatch):
+    scheduler, budget = _setup(monkeypatch, provider_latency=0.0)
+    # Hold the only slot well past the hedge delay
+    ticket = scheduler.acquire(llm.PRIORITY_FIRST_QUESTION, 10)
+    threading.Timer(0.3, scheduler.release, args=(ticket,)).start()
+    llm.hedged_chat_completion(llm.PRIORITY_FIRST_QUESTION, lambda response: response,
+                               model="gpt-4o-mini", messages=MESSAGES)
+    assert budget.hedged == 0
+
+def test_hedge_once_admitted_primary_is_slow(monkeypatch):
+    _, budget = _setup(monkeypatch, provider_latency=0.3)
+    llm.hedged_chat_completion(llm.PRIORITY_FIRST_QUESTION, lambda response: response,
+                               model="gpt-4o-mini", messages=MESSAGES)
+    assert budget.hedged == 1
+
+def test_cancelled_hedge_loser_is_not_logged_as_error(monkeypatch):
+    _, budget = _setup(monkeypatch, provider_latency=0.3)
+    ledger.bind_session("HEDGELEDGER")
+    try:
+        llm.hedged_chat_completion(llm.PRIORITY_FIRST_QUESTION, lambda response: response,
+                                   model="gpt-4o-mini", messages=MESSAGES)
+    finally:
+        ledger.bind_session(None)
+    with ledger._connect() as conn:
+        rows = conn.execute("SELECT ok FROM llm_calls WHERE session_id = ?", ("HEDGELEDGER",)).fetchall()
+    assert budget.hedged == 1
+    assert [row[0] for row in rows] == [1]
+
+def test_hedge_win_observes_the_cancelled_primary(monkeypatch):
+    _, budget = _setup(monkeypatch, provider_latency=0.0)
+    tracker = llm.LatencyTracker()
+    monkeypatch.setattr(llm, "latency_tracker", tracker)
+    monkeypatch.setattr(llm, "scheduler", llm.LLMScheduler(max_concurrency=2))
+    # A slow primary, then a duplicate that answers right away and wins
+    delays = iter([1.0, 0.0])
+    monkeypatch.setattr(mock_llm, "_mock_latency", lambda: next(delays))
+    llm.hedged_chat_completion(llm.PRIORITY_FIRST_QUESTION, lambda response: response,
+                               model="gpt-4o-mini", messages=MESSAGES)
+    samples = sorted(tracker._samples["first_question"])
+    assert budget.hedge_wins == 1
+    # The winner's latency plus the primary's time until it was cancelled
+    assert len(samples) == 2 and samples[-1] >= 0.05
@@ -0,0 +1,79 @@
+import threading
+import deadlines
+import ledger
+import mock_llm
+import quiz_generator
+
+def test_batched_call_is_charged_to_each_session(monkeypatch):
+    monkeypatch.setattr(mock_llm, "MOCK_LLM_LATENCY", 0.0)
+    monkeypatch.setattr(mock_llm, "MOCK_LLM_JITTER", 0.0)
+    batcher = quiz_generator.QuestionBatcher(window=0.5, max_questions=27)
+    sessions = {"BATCHS0": "Python", "BATCHS1": "Go", "BATCHS2": "Kotlin"}
+
+    def candidate(session_id, language):
+        ledger.bind_session(session_id)
+        batcher.request(language, "Medium", 9)
+
+    threads = [threading.Thread(target=candidate, args=item) for item in sessions.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with ledger._connect() as conn:
+        rows = conn.execute(
+            """SELECT session_id, tool, prompt_tokens, completion_tokens FROM llm_calls
+               WHERE session_id IN (?, ?, ?) AND call_site = 'remaining_questions'""",
+            list(sessions)
+        ).fetchall()
+    assert batcher.get_metrics()["batches"] == 1
+    assert {(row["session_id"], row["tool"]) for row in rows} == set(sessions.items())
+    assert len(rows) == 3
+    assert all(row["prompt_tokens"] > 0 and row["completion_tokens"] > 0 for row in rows)
+
+def _run_concurrently(batcher, languages, deadline=None):
+    """Request 9 questions per language at once; returns each result or exception"""
+    results = {}
+
+    def candidate(language):
+        with deadlines.deadline_scope(deadline):
+            try:
+                results[language] = batcher.request(language, "Medium", 9)
+            except Exception as e:
+                results[language] = e
+
+    threads = [threading.Thread(target=candidate, args=(language,)) for language in languages]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_batch_the_deadline_cannot_fit_is_not_sent(monkeypatch):
+    monkeypatch.setattr(mock_llm, "MOCK_LLM_LATENCY", 0.0)
+    monkeypatch.setattr(mock_llm, "MOCK_LLM_JITTER", 0.0)
+    monkeypatch.setattr(quiz_generator, "BATCH_SECONDS_PER_QUESTION", 1.0)
+    sent = []
+    monkeypatch.setattr(quiz_generator, "request_question_batch", lambda *args, **kwargs: sent.append(args))
+    batcher = quiz_generator.QuestionBatcher(window=0.5, max_questions=18)
+    # 18 questions at 1s each can't finish in 10s, but each request alone still gets through
+    results = _run_concurrently(batcher, ["Python", "Go"], deadline=10)
+    assert sent == []
+    assert all(len(questions) == 9 for questions in results.values())
+
+def test_batch_out_of_deadline_skips_the_retries(monkeypatch):
+    def out_of_time(*args, **kwargs):
+        raise deadlines.DeadlineExceeded("Deadline reached")
+    retries = []
+    monkeypatch.setattr(quiz_generator, "request_question_batch", out_of_time)
+    monkeypatch.setattr(quiz_generator, "request_questions", lambda *args, **kwargs: retries.append(args))
+    batcher = quiz_generator.QuestionBatcher(window=0.5, max_questions=18)
+    results = _run_concurrently(batcher, ["Python", "Go"])
+    assert retries == []
+    assert all(isinstance(error, deadlines.DeadlineExceeded) for error in results.values())
+
+def test_batches_are_capped_by_question_count():
+    batcher = quiz_generator.QuestionBatcher(window=0.5, max_questions=18)
+    _run_concurrently(batcher, ["Python", "Go", "Kotlin"])
+    metrics = batcher.get_metrics()
+    assert metrics["batches"] == 2 and metrics["requests"] == 3
@@ -0,0 +1,23 @@
+import render_metrics
+
+def test_summary_percentiles():
+    times = render_metrics.RenderTimes(size=100)
+    for ms in range(1, 201):
+        times.observe(ms / 1000)
+    summary = times.summary()
+    assert summary["renders"] == 200
+    assert summary["window"] == 100
+    assert summary["p50_ms"] == 151
+    assert summary["p90_ms"] == 191
+    assert summary["max_ms"] == 200
+
+def test_reporters_get_the_summary(monkeypatch):
+    monkeypatch.setattr(render_metrics, "LOG_EVERY", 10)
+    times = render_metrics.RenderTimes(size=100)
+    reports = []
+    times.add_reporter(reports.append)
+    times.add_reporter(lambda summary: 1 / 0)  # a failing reporter doesn't break the others
+    for ms in range(1, 26):
+        times.observe(ms / 1000)
+    assert [report["renders"] for report in reports] == [10, 20]
+    assert reports[-1]["max_ms"] == 20